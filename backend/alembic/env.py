@@ -13,7 +13,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from config import get_settings
 from database import Base
 # Import all models to register them with SQLAlchemy
-from models import User, ShoppingList, ListMember, Item  # noqa: F401
+from models import User, ShoppingList, ListMember, Item, Tombstone  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,45 @@
+"""Add shopping_lists.next_sort_index counter
+
+Revision ID: 1322e4c87457
+Revises: c02d8e0355ae
+Create Date: 2026-10-17 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1322e4c87457'
+down_revision: Union[str, Sequence[str], None] = 'c02d8e0355ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'shopping_lists',
+        sa.Column('next_sort_index', sa.Integer(), server_default='1', nullable=False),
+    )
+    # Continue after each list's highest sort index
+    op.execute(
+        """
+        UPDATE shopping_lists
+        SET next_sort_index = last.sort_index + 1
+        FROM (
+            SELECT list_id, max(sort_index) AS sort_index
+            FROM items
+            GROUP BY list_id
+        ) AS last
+        WHERE shopping_lists.id = last.list_id
+          AND last.sort_index >= shopping_lists.next_sort_index
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('shopping_lists', 'next_sort_index')
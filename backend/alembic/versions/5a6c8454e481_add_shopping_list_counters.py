@@ -0,0 +1,63 @@
+"""Add item and checked counters and a version to shopping_lists
+
+Revision ID: 5a6c8454e481
+Revises: 1322e4c87457
+Create Date: 2026-10-17 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a6c8454e481'
+down_revision: Union[str, Sequence[str], None] = '1322e4c87457'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'shopping_lists',
+        sa.Column('item_count', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.add_column(
+        'shopping_lists',
+        sa.Column('checked_count', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.add_column(
+        'shopping_lists',
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    )
+    op.add_column(
+        'shopping_lists',
+        sa.Column('items_updated_at', sa.DateTime(), nullable=True),
+    )
+    op.execute(
+        """
+        UPDATE shopping_lists
+        SET item_count = counts.item_count,
+            checked_count = counts.checked_count,
+            items_updated_at = counts.items_updated_at
+        FROM (
+            SELECT list_id,
+                   count(*) AS item_count,
+                   count(*) FILTER (WHERE is_checked) AS checked_count,
+                   max(updated_at) AS items_updated_at
+            FROM items
+            GROUP BY list_id
+        ) AS counts
+        WHERE shopping_lists.id = counts.list_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('shopping_lists', 'items_updated_at')
+    op.drop_column('shopping_lists', 'version')
+    op.drop_column('shopping_lists', 'checked_count')
+    op.drop_column('shopping_lists', 'item_count')
@@ -0,0 +1,77 @@
+"""Composite and covering indexes for the hot query shapes
+
+Revision ID: 63b6396dac0c
+Revises: b4e1cf14d944
+Create Date: 2026-10-16 11:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '63b6396dac0c'
+down_revision: Union[str, Sequence[str], None] = 'b4e1cf14d944'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Items of a list in display order: WHERE list_id = ? ORDER BY is_checked, sort_index
+    op.create_index(
+        'ix_items_list_id_is_checked_sort_index',
+        'items',
+        ['list_id', 'is_checked', 'sort_index'],
+    )
+    op.drop_index('ix_items_list_id', table_name='items')
+
+    # A user can only be a member of a list once. Keep the strongest role
+    # (owner < editor < viewer in enum order), then the earliest membership.
+    op.execute(
+        """
+        DELETE FROM list_members a
+        USING list_members b
+        WHERE a.list_id = b.list_id
+          AND a.user_id = b.user_id
+          AND (a.role, a.created_at, a.id) > (b.role, b.created_at, b.id)
+        """
+    )
+    # Access checks and role lookups by (list_id, user_id), index-only
+    op.create_index(
+        'uq_list_members_list_id_user_id',
+        'list_members',
+        ['list_id', 'user_id'],
+        unique=True,
+        postgresql_include=['role'],
+    )
+    op.drop_index('ix_list_members_list_id', table_name='list_members')
+
+    # A user's lists: members by user_id joined to lists by list_id, index-only
+    op.create_index(
+        'ix_list_members_user_id_list_id',
+        'list_members',
+        ['user_id', 'list_id'],
+    )
+    op.drop_index('ix_list_members_user_id', table_name='list_members')
+
+    # Non-archived lists, most recently updated first
+    op.create_index(
+        'ix_shopping_lists_active_updated_at',
+        'shopping_lists',
+        [sa.text('updated_at DESC'), 'id'],
+        postgresql_where=sa.text('NOT is_archived'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_shopping_lists_active_updated_at', table_name='shopping_lists')
+    op.create_index('ix_list_members_user_id', 'list_members', ['user_id'])
+    op.drop_index('ix_list_members_user_id_list_id', table_name='list_members')
+    op.create_index('ix_list_members_list_id', 'list_members', ['list_id'])
+    op.drop_index('uq_list_members_list_id_user_id', table_name='list_members')
+    op.create_index('ix_items_list_id', 'items', ['list_id'])
+    op.drop_index('ix_items_list_id_is_checked_sort_index', table_name='items')
@@ -0,0 +1,54 @@
+"""Track the writing transaction of lists, members and items; add tombstones
+
+Revision ID: 7b09a47da8f2
+Revises: ddccb5c824a1
+Create Date: 2026-10-17 14:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b09a47da8f2'
+down_revision: Union[str, Sequence[str], None] = 'ddccb5c824a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CURRENT_XID = sa.text('pg_current_xact_id()::text::bigint')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows get this migration's transaction id
+    for table in ('shopping_lists', 'list_members', 'items'):
+        op.add_column(
+            table,
+            sa.Column('change_xid', sa.BigInteger(), server_default=CURRENT_XID, nullable=False),
+        )
+    op.create_index('ix_items_list_id_change_xid', 'items', ['list_id', 'change_xid'])
+
+    op.create_table(
+        'tombstones',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('entity_type', sa.String(10), nullable=False),
+        sa.Column('entity_id', sa.String(36), nullable=False),
+        sa.Column('list_id', sa.String(36), nullable=False),
+        sa.Column('user_id', sa.String(36), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.Column('change_xid', sa.BigInteger(), server_default=CURRENT_XID, nullable=False),
+    )
+    op.create_index('ix_tombstones_list_id_change_xid', 'tombstones', ['list_id', 'change_xid'])
+    op.create_index('ix_tombstones_user_id_change_xid', 'tombstones', ['user_id', 'change_xid'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tombstones_user_id_change_xid', table_name='tombstones')
+    op.drop_index('ix_tombstones_list_id_change_xid', table_name='tombstones')
+    op.drop_table('tombstones')
+    op.drop_index('ix_items_list_id_change_xid', table_name='items')
+    for table in ('items', 'list_members', 'shopping_lists'):
+        op.drop_column(table, 'change_xid')
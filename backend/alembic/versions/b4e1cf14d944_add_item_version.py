@@ -0,0 +1,31 @@
+"""Add items.version for field-level delta broadcasts
+
+Revision ID: b4e1cf14d944
+Revises: d4bab9901267
+Create Date: 2026-10-16 10:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e1cf14d944'
+down_revision: Union[str, Sequence[str], None] = 'd4bab9901267'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'items',
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('items', 'version')
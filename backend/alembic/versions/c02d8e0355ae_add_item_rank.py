@@ -0,0 +1,47 @@
+"""Add items.rank for fractional ordering
+
+Revision ID: c02d8e0355ae
+Revises: 63b6396dac0c
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c02d8e0355ae'
+down_revision: Union[str, Sequence[str], None] = '63b6396dac0c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('items', sa.Column('rank', sa.String(collation='C'), nullable=True))
+    # Existing items keep their custom order: fixed-width odd decimal ranks
+    # (digits are valid rank digits, and odd numbers never end in "0")
+    op.execute(
+        """
+        UPDATE items
+        SET rank = ranked.rank
+        FROM (
+            SELECT id,
+                   lpad((2 * row_number() OVER (
+                       PARTITION BY list_id ORDER BY sort_index, created_at, id
+                   ) - 1)::text, 10, '0') AS rank
+            FROM items
+        ) AS ranked
+        WHERE items.id = ranked.id
+        """
+    )
+    op.alter_column('items', 'rank', nullable=False)
+    op.create_index('ix_items_list_id_rank', 'items', ['list_id', 'rank'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_items_list_id_rank', table_name='items')
+    op.drop_column('items', 'rank')
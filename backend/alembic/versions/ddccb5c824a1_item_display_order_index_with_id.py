@@ -0,0 +1,40 @@
+"""Add id to the items display-order index for keyset pagination
+
+Revision ID: ddccb5c824a1
+Revises: 5a6c8454e481
+Create Date: 2026-10-17 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ddccb5c824a1'
+down_revision: Union[str, Sequence[str], None] = '5a6c8454e481'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Pages of a list's items: WHERE list_id = ? AND (is_checked, sort_index, id) > (...)
+    # ORDER BY is_checked, sort_index, id
+    op.create_index(
+        'ix_items_list_id_is_checked_sort_index_id',
+        'items',
+        ['list_id', 'is_checked', 'sort_index', 'id'],
+    )
+    op.drop_index('ix_items_list_id_is_checked_sort_index', table_name='items')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        'ix_items_list_id_is_checked_sort_index',
+        'items',
+        ['list_id', 'is_checked', 'sort_index'],
+    )
+    op.drop_index('ix_items_list_id_is_checked_sort_index_id', table_name='items')
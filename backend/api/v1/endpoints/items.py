@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.dependencies import get_current_user_id
-from database import get_db
+from database import get_async_db
+from etags import CACHE_CONTROL, etag_matches, not_modified
 from schemas.item import (
     ItemCreate,
     ItemUpdate,
@@ -12,6 +15,7 @@ from schemas.item import (
     ItemBatchDelete,
     BatchOperationResponse,
     ItemReorder,
+    ItemMove,
 )
 from services.item_service import ItemService
 
@@ -22,47 +26,83 @@ router = APIRouter(prefix="/lists/{list_id}/items", tags=["items"])
 async def create_item(
     list_id: str,
     item_data: ItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Create a new item in a shopping list."""
     service = ItemService(db)
-    return service.create_item(list_id, item_data, current_user_id)
+    return await service.create_item(list_id, item_data, current_user_id)
 
 
 @router.post("/batch", response_model=list[ItemResponse], status_code=status.HTTP_201_CREATED)
 async def create_items_batch(
     list_id: str,
     batch_data: ItemBatchCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Create multiple items at once (for comma-separated input)."""
     service = ItemService(db)
-    return service.create_items_batch(list_id, batch_data.names, current_user_id)
+    return await service.create_items_batch(list_id, batch_data.names, current_user_id)
 
 
 @router.get("", response_model=list[ItemResponse])
-def get_items(
+async def get_items(
     list_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=1000, description="Items per page (default: all)"),
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page"),
+    fields: str | None = Query(None, description="Comma-separated fields to return (id is always included)"),
+    unchecked_only: bool = Query(False, description="Leave out checked items"),
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
-    """Get all items in a shopping list."""
+    """
+    Get the items in a shopping list, unchecked first.
+
+    With limit, returns one page; the X-Next-Cursor response header is the
+    cursor for the next page and is absent on the last one.
+
+    Sends an ETag; with a matching If-None-Match, returns 304 without reading
+    the items.
+    """
     service = ItemService(db)
-    return service.get_items(list_id, current_user_id)
+    field_names = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    etag = await service.get_items_etag(
+        list_id, current_user_id, limit, cursor, field_names, unchecked_only
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    items, next_cursor = await service.get_items(
+        list_id,
+        current_user_id,
+        limit=limit,
+        cursor=cursor,
+        fields=field_names,
+        unchecked_only=unchecked_only,
+    )
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if field_names:
+        # Partial items do not fit the response model; skip its validation
+        return JSONResponse(jsonable_encoder(items), headers=headers)
+    response.headers.update(headers)
+    return items
 
 
 @router.get("/{item_id}", response_model=ItemResponse)
-def get_item(
+async def get_item(
     list_id: str,
     item_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Get a specific item."""
     service = ItemService(db)
-    return service.get_item(list_id, item_id, current_user_id)
+    return await service.get_item(list_id, item_id, current_user_id)
 
 
 @router.patch("/{item_id}", response_model=ItemResponse)
@@ -70,47 +110,47 @@ async def update_item(
     list_id: str,
     item_id: str,
     update_data: ItemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Update an item."""
     service = ItemService(db)
-    return service.update_item(list_id, item_id, update_data, current_user_id)
+    return await service.update_item(list_id, item_id, update_data, current_user_id)
 
 
 @router.post("/{item_id}/toggle", response_model=ItemResponse)
 async def toggle_item(
     list_id: str,
     item_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Toggle an item's checked status."""
     service = ItemService(db)
-    return service.toggle_item(list_id, item_id, current_user_id)
+    return await service.toggle_item(list_id, item_id, current_user_id)
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_item(
     list_id: str,
     item_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Delete an item."""
     service = ItemService(db)
-    service.delete_item(list_id, item_id, current_user_id)
+    await service.delete_item(list_id, item_id, current_user_id)
 
 
 @router.delete("", status_code=status.HTTP_200_OK)
-def clear_checked_items(
+async def clear_checked_items(
     list_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Delete all checked items in a list."""
     service = ItemService(db)
-    count = service.clear_checked(list_id, current_user_id)
+    count = await service.clear_checked(list_id, current_user_id)
     return {"deleted_count": count}
 
 
@@ -118,27 +158,27 @@ def clear_checked_items(
 async def batch_check_items(
     list_id: str,
     batch_data: ItemBatchCheck,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Check or uncheck multiple items at once."""
     service = ItemService(db)
-    count = service.batch_check(
+    count = await service.batch_check(
         list_id, batch_data.item_ids, batch_data.checked, current_user_id
     )
     return BatchOperationResponse(success=True, count=count)
 
 
 @router.post("/batch-delete", response_model=BatchOperationResponse)
-def batch_delete_items(
+async def batch_delete_items(
     list_id: str,
     batch_data: ItemBatchDelete,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Delete multiple items at once."""
     service = ItemService(db)
-    count = service.batch_delete(list_id, batch_data.item_ids, current_user_id)
+    count = await service.batch_delete(list_id, batch_data.item_ids, current_user_id)
     return BatchOperationResponse(success=True, count=count)
 
 
@@ -146,10 +186,23 @@ def batch_delete_items(
 async def reorder_items(
     list_id: str,
     reorder_data: ItemReorder,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Reorder items in a list by updating their sort indices."""
     service = ItemService(db)
-    result = service.reorder_items(list_id, reorder_data, current_user_id)
+    result = await service.reorder_items(list_id, reorder_data, current_user_id)
     return BatchOperationResponse(success=result["success"], count=result["count"])
+
+
+@router.post("/{item_id}/move", response_model=ItemResponse)
+async def move_item(
+    list_id: str,
+    item_id: str,
+    move_data: ItemMove,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: str = Depends(get_current_user_id),
+):
+    """Move an item between two others (ranked ordering). Only the moved item changes."""
+    service = ItemService(db)
+    return await service.move_item(list_id, item_id, move_data, current_user_id)
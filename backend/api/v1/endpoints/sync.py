@@ -1,24 +1,26 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.dependencies import get_current_user_id
-from database import get_db
+from database import get_async_db
 from models.shopping_list import ShoppingList
 from models.item import Item
-from schemas.sync import BatchSyncRequest, BatchSyncResponse, SyncResultItem
+from schemas.sync import BatchSyncRequest, BatchSyncResponse, ChangesResponse, SyncResultItem
 from schemas.list import ListCreate, ListUpdate
 from schemas.item import ItemCreate, ItemUpdate
 from services.list_service import ListService
 from services.item_service import ItemService
+from services.sync_service import SyncService
 
 router = APIRouter(prefix="/sync", tags=["sync"])
 
 
 @router.post("/batch", response_model=BatchSyncResponse, status_code=status.HTTP_200_OK)
-def batch_sync(
+async def batch_sync(
     sync_data: BatchSyncRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Process batched offline changes from client.
@@ -47,7 +49,7 @@ def batch_sync(
                     color=list_data.get("color", "#4CAF50"),
                     icon=list_data.get("icon", "shopping_cart"),
                 )
-                created_list = list_service.create_list(list_create, current_user_id)
+                created_list = await list_service.create_list(list_create, current_user_id)
                 results.append(
                     SyncResultItem(
                         action_id=action.id,
@@ -63,10 +65,12 @@ def batch_sync(
                 list_id = item_data.get("list_id")
 
                 # Verify user owns the list
-                shopping_list = db.query(ShoppingList).filter(
-                    ShoppingList.id == list_id,
-                    ShoppingList.owner_id == current_user_id,
-                ).first()
+                shopping_list = await db.scalar(
+                    select(ShoppingList).where(
+                        ShoppingList.id == list_id,
+                        ShoppingList.owner_id == current_user_id,
+                    )
+                )
 
                 if not shopping_list:
                     raise ValueError("List not found or unauthorized")
@@ -77,7 +81,7 @@ def batch_sync(
                     unit=item_data.get("unit"),
                     note=item_data.get("note"),
                 )
-                created_item = item_service.create_item(
+                created_item = await item_service.create_item(
                     list_id, item_create, current_user_id
                 )
                 results.append(
@@ -95,10 +99,12 @@ def batch_sync(
                 list_data = action.payload
 
                 # Verify user owns the list
-                shopping_list = db.query(ShoppingList).filter(
-                    ShoppingList.id == list_id,
-                    ShoppingList.owner_id == current_user_id,
-                ).first()
+                shopping_list = await db.scalar(
+                    select(ShoppingList).where(
+                        ShoppingList.id == list_id,
+                        ShoppingList.owner_id == current_user_id,
+                    )
+                )
 
                 if not shopping_list:
                     raise ValueError("List not found or unauthorized")
@@ -132,7 +138,7 @@ def batch_sync(
                         icon=list_data.get("icon"),
                         is_archived=list_data.get("is_archived"),
                     )
-                    updated_list = list_service.update_list(
+                    updated_list = await list_service.update_list(
                         list_id, list_update, current_user_id
                     )
                     results.append(
@@ -151,15 +157,17 @@ def batch_sync(
                 list_id = item_data.get("list_id")
 
                 # Verify user owns the list
-                shopping_list = db.query(ShoppingList).filter(
-                    ShoppingList.id == list_id,
-                    ShoppingList.owner_id == current_user_id,
-                ).first()
+                shopping_list = await db.scalar(
+                    select(ShoppingList).where(
+                        ShoppingList.id == list_id,
+                        ShoppingList.owner_id == current_user_id,
+                    )
+                )
 
                 if not shopping_list:
                     raise ValueError("List not found or unauthorized")
 
-                item = db.query(Item).filter(Item.id == item_id).first()
+                item = await db.get(Item, item_id)
                 if not item:
                     raise ValueError("Item not found")
 
@@ -194,7 +202,7 @@ def batch_sync(
                         note=item_data.get("note"),
                         is_checked=item_data.get("is_checked"),
                     )
-                    updated_item = item_service.update_item(
+                    updated_item = await item_service.update_item(
                         list_id, item_id, item_update, current_user_id
                     )
                     results.append(
@@ -211,15 +219,17 @@ def batch_sync(
                 list_id = action.entity_id
 
                 # Verify user owns the list
-                shopping_list = db.query(ShoppingList).filter(
-                    ShoppingList.id == list_id,
-                    ShoppingList.owner_id == current_user_id,
-                ).first()
+                shopping_list = await db.scalar(
+                    select(ShoppingList).where(
+                        ShoppingList.id == list_id,
+                        ShoppingList.owner_id == current_user_id,
+                    )
+                )
 
                 if not shopping_list:
                     raise ValueError("List not found or unauthorized")
 
-                list_service.delete_list(list_id, current_user_id)
+                await list_service.delete_list(list_id, current_user_id)
                 results.append(
                     SyncResultItem(
                         action_id=action.id,
@@ -235,15 +245,17 @@ def batch_sync(
                 list_id = action.payload.get("list_id")
 
                 # Verify user owns the list
-                shopping_list = db.query(ShoppingList).filter(
-                    ShoppingList.id == list_id,
-                    ShoppingList.owner_id == current_user_id,
-                ).first()
+                shopping_list = await db.scalar(
+                    select(ShoppingList).where(
+                        ShoppingList.id == list_id,
+                        ShoppingList.owner_id == current_user_id,
+                    )
+                )
 
                 if not shopping_list:
                     raise ValueError("List not found or unauthorized")
 
-                item_service.delete_item(list_id, item_id, current_user_id)
+                await item_service.delete_item(list_id, item_id, current_user_id)
                 results.append(
                     SyncResultItem(
                         action_id=action.id,
@@ -268,9 +280,9 @@ def batch_sync(
 
     # Commit all changes
     try:
-        db.commit()
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise
 
     return BatchSyncResponse(
@@ -280,3 +292,23 @@ def batch_sync(
         failed_count=failed_count,
         conflict_count=conflict_count,
     )
+
+
+@router.get("/changes", response_model=ChangesResponse)
+async def get_changes(
+    cursor: str | None = Query(None, description="cursor of the previous response; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=2000, description="Most changes per response"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: str = Depends(get_current_user_id),
+):
+    """Pull the lists, members and items created, updated or deleted since a cursor.
+
+    Without a cursor, returns everything the user can see. Each response
+    carries a new cursor; while has_more is true, request again with it right
+    away. Once has_more is false, keep the cursor for the next sync. Apply
+    lists, members and items as upserts (a change can arrive twice), and
+    drop what is in deleted; a "member" deletion of the user themselves means
+    they lost access to that list.
+    """
+    service = SyncService(db)
+    return await service.get_changes(current_user_id, cursor, limit)
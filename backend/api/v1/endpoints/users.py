@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.dependencies import get_current_user_id
-from database import get_db
+from database import get_async_db
 from models import User
 from schemas.auth import UserResponse
 
@@ -10,16 +11,16 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/search", response_model=list[UserResponse])
-def search_users(
+async def search_users(
     q: str = Query("", description="Search query for user name"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: str = Depends(get_current_user_id),
 ):
     """Get all users, optionally filtered by search query on name. Current user is always included."""
-    query = db.query(User).filter(User.is_active == True)  # noqa: E712
+    query = select(User).where(User.is_active == True)  # noqa: E712
 
     if q:
-        query = query.filter(User.name.ilike(f"%{q}%"))
+        query = query.where(User.name.ilike(f"%{q}%"))
 
-    users = query.all()
-    return users
+    users = await db.scalars(query)
+    return users.all()
@@ -2,69 +2,283 @@
 from fastapi import APIRouter, Query, WebSocketDisconnect, WebSocket, status
 
 from auth.security import decode_token
+from websocket_codec import COMPRESSIONS, ENCODINGS
 from websocket_manager import manager
 
 router = APIRouter()
 
 
-@router.websocket("/ws/lists/{list_id}")
-async def websocket_endpoint(websocket: WebSocket, list_id: str, token: str = Query(...)):
+async def _authenticate(websocket: WebSocket, token: str) -> tuple[str, str] | None:
     """
-    WebSocket endpoint for real-time list synchronization.
-
-    Query Parameters:
-        token: JWT token for authentication
+    Resolve the user for a WebSocket token.
 
-    Connects user to a list's WebSocket channel for real-time updates.
+    Returns (user_id, user_name), or closes the socket and returns None if the
+    token is invalid or the user does not exist.
     """
-    # Verify authentication
     try:
         payload = decode_token(token)
         if payload is None:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-            return
+            return None
         user_id = payload.get("sub")
         if not user_id:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-            return
+            return None
     except Exception:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
-
-    # TODO: Verify user has access to list
-    # For now, we'll assume access is granted
-    # In production, check list membership in database
+        return None
 
     # Get user info from database for broadcasting
     # Use a context manager to ensure the connection is released immediately
     from models.user import User
-    from database import SessionLocal
+    from database import AsyncSessionLocal
 
-    with SessionLocal() as db:
-        user = db.query(User).filter(User.id == user_id).first()
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
         if not user:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-            return
+            return None
         user_name = user.name  # Copy the data we need before closing the session
 
+    return user_id, user_name
+
+
+def _negotiate(encoding: str, compression: str | None) -> tuple[str, bool] | None:
+    """Validate the requested wire format; returns (encoding, compress) or None if unsupported."""
+    if encoding not in ENCODINGS:
+        return None
+    if compression is not None and compression not in COMPRESSIONS:
+        return None
+    return encoding, compression is not None
+
+
+async def _item_snapshot(list_id: str, item_ids: list[str] | None) -> list[dict]:
+    """Current state of a list's items (or only the given ones), serialized for a snapshot frame."""
+    from repositories.item_repository import ItemRepository
+    from schemas.item import ItemResponse
+    from database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        items = await ItemRepository(db).get_all_for_list(list_id)
+    if item_ids is not None:
+        wanted = set(item_ids)
+        items = [item for item in items if item.id in wanted]
+    return [ItemResponse.model_validate(item).model_dump(mode="json") for item in items]
+
+
+async def _send_snapshot(connection, list_id: str, item_ids: list[str] | None) -> None:
+    """Answer a snapshot request for a list the connection is subscribed to."""
+    if list_id not in connection.lists:
+        return
+    if item_ids is not None and not (
+        isinstance(item_ids, list) and all(isinstance(item_id, str) for item_id in item_ids)
+    ):
+        connection.send({
+            "type": "snapshot_error",
+            "list_id": list_id,
+            "detail": "item_ids must be a list of item ids",
+        })
+        return
+    connection.send({
+        "type": "items_snapshot",
+        "list_id": list_id,
+        "items": await _item_snapshot(list_id, item_ids),
+    })
+
+
+def _replay_position(data: dict) -> tuple[int | None, str | None] | None:
+    """
+    Validate the last_seq and epoch of a subscribe message.
+
+    Returns (last_seq, epoch), or None if either has the wrong type.
+    """
+    last_seq = data.get("last_seq")
+    epoch = data.get("epoch")
+    # bool is an int subclass, but true is not a sequence number
+    if last_seq is not None and (not isinstance(last_seq, int) or isinstance(last_seq, bool)):
+        return None
+    if epoch is not None and not isinstance(epoch, str):
+        return None
+    return last_seq, epoch
+
+
+async def _has_list_access(list_id: str, user_id: str) -> bool:
+    """Check whether a user is a member of a list (cached, like the REST checks)."""
+    from fastapi import HTTPException
+
+    from database import AsyncSessionLocal
+    from repositories.list_repository import ListRepository
+    from services.access import get_member_role
+
+    async with AsyncSessionLocal() as db:
+        try:
+            await get_member_role(ListRepository(db), list_id, user_id)
+        except HTTPException:
+            return False
+        return True
+
+
+@router.websocket("/ws/lists/{list_id}")
+async def websocket_endpoint(
+    websocket: WebSocket,
+    list_id: str,
+    token: str = Query(...),
+    last_seq: int | None = Query(None),
+    epoch: str | None = Query(None),
+    encoding: str = Query("json"),
+    compression: str | None = Query(None),
+    deltas: bool = Query(False),
+    heartbeat: bool = Query(False),
+):
+    """
+    WebSocket endpoint for real-time list synchronization.
+
+    Query Parameters:
+        token: JWT token for authentication
+        last_seq: Sequence number of the last event seen, when reconnecting
+        epoch: Epoch from the previous connection's "connected" frame
+        encoding: "json" (text frames, default) or "msgpack" (binary frames
+            with short keys; see websocket_codec)
+        compression: "deflate" to receive binary frames, deflated when large
+        deltas: true to receive item updates as item_patched field deltas
+        heartbeat: true to receive {"type": "ping"} frames; the client must
+            answer with {"type": "pong"} (or any frame) or it is disconnected
+
+    Connects user to a list's WebSocket channel for real-time updates.
+    Reconnecting clients that pass last_seq and epoch receive only the events
+    they missed, or "resync_required" if those are no longer available.
+    A client whose item versions fall behind the patches it receives sends
+    {"type": "snapshot", "item_ids": [...]} (omit item_ids for every item)
+    and gets an "items_snapshot" frame with the full items.
+    """
+    # Verify authentication
+    user = await _authenticate(websocket, token)
+    if user is None:
+        return
+    user_id, user_name = user
+
+    wire_format = _negotiate(encoding, compression)
+    if wire_format is None or not await _has_list_access(list_id, user_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
     try:
-        await manager.connect(websocket, list_id, user_id, user_name)
+        connection = await manager.connect(
+            websocket, list_id, user_id, user_name, last_seq, epoch,
+            *wire_format, deltas, heartbeat,
+        )
 
         while True:
             data = await websocket.receive_json()
+            # Any frame (including "pong" replies to server pings) is a heartbeat
+            connection.touch()
+            if not isinstance(data, dict):
+                continue
             message_type = data.get("type")
 
-            # Handle typing indicator
+            # Handle typing indicator (throttled by the manager)
             if message_type == "typing":
-                await manager.broadcast(
-                    list_id,
-                    {
-                        "type": "user_typing",
-                        "user_id": user_id,
-                        "user_name": user_name,
-                    },
-                    exclude=websocket,
-                )
+                manager.typing(connection, list_id)
+
+            # Full items for a client that missed a patch's base version
+            elif message_type == "snapshot":
+                await _send_snapshot(connection, list_id, data.get("item_ids"))
+
+            # Handle sync acknowledgment
+            elif message_type == "sync_ack":
+                # Client acknowledges receiving a sync message
+                pass
+
+    except WebSocketDisconnect:
+        await manager.disconnect(websocket)
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+        await manager.disconnect(websocket)
+
+
+@router.websocket("/ws")
+async def multiplexed_websocket_endpoint(
+    websocket: WebSocket,
+    token: str = Query(...),
+    encoding: str = Query("json"),
+    compression: str | None = Query(None),
+    deltas: bool = Query(False),
+    heartbeat: bool = Query(False),
+):
+    """
+    Multiplexed WebSocket endpoint: one connection for any number of lists.
+
+    Query Parameters:
+        token: JWT token for authentication
+        encoding: "json" (default) or "msgpack", as for /ws/lists/{list_id}
+        compression: "deflate" to receive binary frames, deflated when large
+        deltas: true to receive item updates as item_patched field deltas
+        heartbeat: true to receive pings, as for /ws/lists/{list_id}
+
+    Control messages from the client:
+        {"type": "subscribe", "list_id": ..., "last_seq": ..., "epoch": ...}
+        {"type": "unsubscribe", "list_id": ...}
+        {"type": "typing", "list_id": ...}
+        {"type": "snapshot", "list_id": ..., "item_ids": [...]}
+        {"type": "pong"}  (reply to the server's {"type": "ping"}, with heartbeat)
+
+    Every frame sent by the server carries the list_id it belongs to. A
+    subscribe is answered with the list's "connected" frame (plus any replay),
+    or a "subscribe_error" frame if the user has no access to the list or
+    last_seq/epoch are malformed.
+    """
+    user = await _authenticate(websocket, token)
+    if user is None:
+        return
+    user_id, user_name = user
+
+    wire_format = _negotiate(encoding, compression)
+    if wire_format is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    connection = await manager.register(
+        websocket, user_id, user_name, *wire_format, deltas, heartbeat
+    )
+    try:
+        while True:
+            data = await websocket.receive_json()
+            # Any frame (including "pong" replies to server pings) is a heartbeat
+            connection.touch()
+            if not isinstance(data, dict):
+                continue
+            message_type = data.get("type")
+            list_id = data.get("list_id")
+            if not isinstance(list_id, str):
+                list_id = None
+
+            if message_type == "subscribe" and list_id:
+                position = _replay_position(data)
+                if position is None:
+                    connection.send({
+                        "type": "subscribe_error",
+                        "list_id": list_id,
+                        "detail": "last_seq must be an integer and epoch a string",
+                    })
+                elif await _has_list_access(list_id, user_id):
+                    await manager.subscribe(connection, list_id, *position)
+                else:
+                    connection.send({
+                        "type": "subscribe_error",
+                        "list_id": list_id,
+                        "detail": "You don't have access to this list",
+                    })
+
+            elif message_type == "unsubscribe" and list_id:
+                await manager.unsubscribe(connection, list_id)
+
+            # Handle typing indicator (throttled by the manager)
+            elif message_type == "typing" and list_id:
+                manager.typing(connection, list_id)
+
+            # Full items for a client that missed a patch's base version
+            elif message_type == "snapshot" and list_id:
+                await _send_snapshot(connection, list_id, data.get("item_ids"))
 
             # Handle sync acknowledgment
             elif message_type == "sync_ack":
@@ -72,7 +286,7 @@ async def websocket_endpoint(websocket: WebSocket, list_id: str, token: str = Qu
                 pass
 
     except WebSocketDisconnect:
-        await manager.disconnect(websocket, list_id, user_id)
+        await manager.disconnect(websocket)
     except Exception as e:
         print(f"WebSocket error: {e}")
-        await manager.disconnect(websocket, list_id, user_id)
+        await manager.disconnect(websocket)
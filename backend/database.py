@@ -1,26 +1,73 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy import BigInteger, create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, mapped_column
 
 from config import get_settings
+from db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_options
 
 settings = get_settings()
 
+# Synchronous engine for Alembic and the scripts in scripts/
 engine = create_engine(
     settings.get_database_url,
     echo=settings.sql_echo,
-    pool_pre_ping=True,
+    poolclass=InstrumentedQueuePool,
+    **pool_options(settings),
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Rows returned by write paths are serialized after commit; keep their loaded
+# state instead of reloading every object on first access
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+# Request handlers use the asyncpg engine, so waiting on Postgres never blocks
+# the event loop (and with it every WebSocket served by this worker)
+async_engine = create_async_engine(
+    settings.get_async_database_url,
+    echo=settings.sql_echo,
+    poolclass=InstrumentedAsyncQueuePool,
+    **pool_options(settings),
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 
 class Base(DeclarativeBase):
     pass
 
 
+# Id of the current transaction (64-bit, so it never wraps around)
+CURRENT_XID = text("pg_current_xact_id()::text::bigint")
+
+
+def change_xid_column():
+    """
+    Id of the transaction that last inserted or updated the row, set on every
+    write, for the change feed of GET /sync/changes.
+    """
+    return mapped_column(
+        BigInteger, default=CURRENT_XID, onupdate=CURRENT_XID, server_default=CURRENT_XID
+    )
+
+
+# Execution options for an ORM UPDATE ... RETURNING(Entity). The session is
+# not synchronized by evaluating the SET clause in Python; instead the
+# returned rows overwrite any copy of the entity already loaded in the
+# session, which the identity map would otherwise hand back unchanged.
+UPDATE_RETURNING_OPTIONS = {"synchronize_session": False, "populate_existing": True}
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
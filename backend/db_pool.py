@@ -0,0 +1,104 @@
+"""Connection pool configuration and checkout metrics."""
+import time
+from collections import deque
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from config import Settings
+
+
+class PoolMetrics:
+    """
+    Checkout counters for one connection pool.
+
+    Wait time runs from asking the pool for a connection until it is handed
+    over, so it includes queueing behind other requests when the pool is
+    exhausted, opening a new connection, and the pre-ping round trip when
+    enabled.
+    """
+
+    __slots__ = ("checkouts", "timeouts", "wait_seconds_total", "wait_seconds_max", "recent_waits")
+
+    def __init__(self, window: int = 1024):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        # Most recent waits, for percentiles that reflect current load
+        self.recent_waits: deque = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+        self.recent_waits.append(seconds)
+
+    def snapshot(self) -> dict:
+        waits = sorted(self.recent_waits)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 3)
+
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_avg": round(self.wait_seconds_total / self.checkouts * 1000, 3)
+            if self.checkouts else 0.0,
+            "wait_ms_p50": percentile(0.50),
+            "wait_ms_p95": percentile(0.95),
+            "wait_ms_p99": percentile(0.99),
+            "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+        }
+
+
+class _InstrumentedPool:
+    """Mixin timing every checkout of a QueuePool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+    def stats(self) -> dict:
+        """Current occupancy plus checkout counters."""
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            # overflow() counts up from -size until the pool is full
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            **self.metrics.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(settings: Settings) -> dict:
+    """create_engine/create_async_engine pool arguments from settings."""
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
@@ -0,0 +1,37 @@
+"""
+Strong ETags and If-None-Match handling for conditional GETs.
+
+ETags are derived from version counters that are cheap to read (a list's
+version, a digest of a user's list versions), so a request whose ETag still
+matches can be answered with 304 before any rows are loaded or serialized.
+"""
+import hashlib
+
+from fastapi import Response, status
+
+# Revalidate on every use; the ETag makes that cheap
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """A strong ETag for a representation identified by parts."""
+    digest = hashlib.sha1("\0".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison, RFC 9110)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
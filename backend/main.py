@@ -1,11 +1,15 @@
+import secrets
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from config import get_settings
-from database import engine, Base
+from database import async_engine, Base
 from api.v1.router import api_router
+from membership_cache import membership_cache
+from websocket_manager import manager
 
 # Import models to register them with SQLAlchemy
 from models import User, ShoppingList, ListMember  # noqa: F401
@@ -20,13 +24,18 @@ async def lifespan(app: FastAPI):
     # Verify database connectivity on startup
     from sqlalchemy import text
     try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         print("✓ Database connection successful")
     except Exception as e:
         print(f"✗ Database connection failed: {e}")
         raise
+
+    # Relay WebSocket broadcasts between instances
+    await manager.start()
     yield
+    await manager.stop()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -41,6 +50,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Conditional GETs, and the pagination cursor of GET /lists/{list_id}/items
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Include API router
@@ -50,3 +61,32 @@ app.include_router(api_router)
 @app.get("/")
 def health_check():
     return {"status": "healthy", "app": settings.app_name}
+
+
+metrics_bearer = HTTPBearer(auto_error=False)
+
+
+def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(metrics_bearer),
+):
+    """Allow only callers presenting METRICS_TOKEN; hide the endpoint when none is set."""
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials, settings.metrics_token
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)], include_in_schema=False)
+def metrics():
+    """Runtime counters for this instance."""
+    return {
+        "websocket": manager.stats(),
+        "db_pool": async_engine.pool.stats(),
+        "membership_cache": membership_cache.stats(),
+    }
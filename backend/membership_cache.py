@@ -0,0 +1,69 @@
+"""Per-process cache of list memberships for access checks."""
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import get_settings
+
+
+class MembershipCache:
+    """
+    Roles of (list_id, user_id) pairs that recently passed an access check.
+
+    Only memberships are cached, never their absence, so a user added to a
+    list has access straight away. Membership changes made through this
+    process invalidate their entries immediately; other instances only see
+    them once their entries expire, so the TTL bounds how long a removed
+    member or a lowered role keeps working there.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # (list_id, user_id) -> (expires_at, role), least recently used first
+        self._entries: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, list_id: str, user_id: str) -> Optional[str]:
+        """The cached role, or None when unknown or expired."""
+        key = (list_id, user_id)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, list_id: str, user_id: str, role: str) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        key = (list_id, user_id)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, role)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, list_id: str, user_id: Optional[str] = None) -> None:
+        """Forget one membership, or every membership of a list."""
+        if user_id is not None:
+            self._entries.pop((list_id, user_id), None)
+            return
+        for key in [key for key in self._entries if key[0] == list_id]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_settings = get_settings()
+membership_cache = MembershipCache(
+    _settings.membership_cache_ttl_seconds, _settings.membership_cache_max_entries
+)
@@ -0,0 +1,231 @@
+"""Message bus for relaying WebSocket broadcasts between server instances."""
+import asyncio
+import json
+import uuid
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from config import Settings
+
+MessageHandler = Callable[[str, dict], Awaitable[None]]
+
+
+class MessageBus(ABC):
+    """
+    Relays list messages to the other nodes that have local subscribers.
+
+    Each node publishes the messages it broadcasts locally and receives the
+    messages published by every other node, but only for the lists it has
+    subscribed to. A node never receives its own messages back.
+    """
+
+    def __init__(self):
+        self.node_id = uuid.uuid4().hex
+        self._handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler) -> None:
+        """Start receiving messages, passing each one to handler(list_id, message)."""
+        self._handler = handler
+
+    async def stop(self) -> None:
+        """Stop receiving messages and release any resources."""
+        self._handler = None
+
+    @abstractmethod
+    async def subscribe(self, list_id: str) -> None:
+        """Start receiving messages published for a list."""
+
+    @abstractmethod
+    async def unsubscribe(self, list_id: str) -> None:
+        """Stop receiving messages published for a list."""
+
+    @abstractmethod
+    async def publish(self, list_id: str, message: dict) -> None:
+        """Publish a message to the other nodes subscribed to a list."""
+
+    async def _dispatch(self, list_id: str, message: dict) -> None:
+        if self._handler is None:
+            return
+        try:
+            await self._handler(list_id, message)
+        except Exception as e:
+            print(f"[Bus] Handler failed for list {list_id}: {e}")
+
+
+class InMemoryHub:
+    """Shared routing table for in-process buses."""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set["InMemoryMessageBus"]] = {}
+
+
+_default_hub = InMemoryHub()
+
+
+class InMemoryMessageBus(MessageBus):
+    """
+    Message bus for a single process.
+
+    With one ConnectionManager per process there is no other node to relay to,
+    so publishing is a no-op. Several buses attached to the same hub behave
+    like separate nodes, which is useful for exercising multi-node fan-out
+    without a database.
+    """
+
+    def __init__(self, hub: Optional[InMemoryHub] = None):
+        super().__init__()
+        self.hub = hub or _default_hub
+
+    async def stop(self) -> None:
+        for subscribers in self.hub.subscribers.values():
+            subscribers.discard(self)
+        await super().stop()
+
+    async def subscribe(self, list_id: str) -> None:
+        self.hub.subscribers.setdefault(list_id, set()).add(self)
+
+    async def unsubscribe(self, list_id: str) -> None:
+        subscribers = self.hub.subscribers.get(list_id)
+        if subscribers is None:
+            return
+        subscribers.discard(self)
+        if not subscribers:
+            del self.hub.subscribers[list_id]
+
+    async def publish(self, list_id: str, message: dict) -> None:
+        for bus in list(self.hub.subscribers.get(list_id, ())):
+            if bus is not self:
+                await bus._dispatch(list_id, message)
+
+
+class PostgresMessageBus(MessageBus):
+    """
+    Message bus backed by Postgres LISTEN/NOTIFY.
+
+    Every list gets its own notification channel, and a node only LISTENs on
+    the channels of lists it has local subscribers for, so Postgres only
+    delivers the notifications this node will actually forward.
+    """
+
+    # Postgres rejects NOTIFY payloads of 8000 bytes or more
+    MAX_PAYLOAD_BYTES = 7900
+    RECONNECT_DELAY_SECONDS = 2.0
+
+    def __init__(self, dsn: str, channel_prefix: str = "listonit_"):
+        super().__init__()
+        self.dsn = dsn
+        self.channel_prefix = channel_prefix
+        self._listen_conn = None
+        self._publish_pool = None
+        self._channels: Set[str] = set()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def _channel(self, list_id: str) -> str:
+        return f"{self.channel_prefix}{list_id}"
+
+    async def start(self, handler: MessageHandler) -> None:
+        import asyncpg
+
+        await super().start(handler)
+        self._stopping = False
+        self._publish_pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=2)
+        await self._open_listener()
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._listen_conn is not None:
+            await self._listen_conn.close()
+            self._listen_conn = None
+        if self._publish_pool is not None:
+            await self._publish_pool.close()
+            self._publish_pool = None
+        await super().stop()
+
+    async def _open_listener(self) -> None:
+        import asyncpg
+
+        self._listen_conn = await asyncpg.connect(self.dsn)
+        self._listen_conn.add_termination_listener(self._on_terminated)
+        for channel in self._channels:
+            await self._listen_conn.add_listener(channel, self._on_notify)
+
+    def _on_terminated(self, connection) -> None:
+        if self._stopping or self._reconnect_task is not None:
+            return
+        print("[Bus] Listener connection lost, reconnecting")
+        self._listen_conn = None
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        try:
+            while not self._stopping:
+                try:
+                    await self._open_listener()
+                    print(f"[Bus] Listener reconnected, {len(self._channels)} channels restored")
+                    return
+                except Exception as e:
+                    print(f"[Bus] Reconnect failed: {e}")
+                    await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+        finally:
+            self._reconnect_task = None
+
+    async def subscribe(self, list_id: str) -> None:
+        channel = self._channel(list_id)
+        if channel in self._channels:
+            return
+        self._channels.add(channel)
+        if self._listen_conn is not None:
+            await self._listen_conn.add_listener(channel, self._on_notify)
+
+    async def unsubscribe(self, list_id: str) -> None:
+        channel = self._channel(list_id)
+        if channel not in self._channels:
+            return
+        self._channels.discard(channel)
+        if self._listen_conn is not None:
+            await self._listen_conn.remove_listener(channel, self._on_notify)
+
+    async def publish(self, list_id: str, message: dict) -> None:
+        if self._publish_pool is None:
+            return
+
+        payload = json.dumps({"node": self.node_id, "message": message})
+        if len(payload.encode("utf-8")) > self.MAX_PAYLOAD_BYTES:
+            # Too large for NOTIFY; tell other nodes' clients to refetch instead
+            print(f"[Bus] Message for list {list_id} too large to relay, sending resync")
+            payload = json.dumps({
+                "node": self.node_id,
+                "message": {"type": "resync_required", "list_id": list_id},
+            })
+
+        await self._publish_pool.execute(
+            "SELECT pg_notify($1, $2)", self._channel(list_id), payload
+        )
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            envelope = json.loads(payload)
+        except ValueError:
+            print(f"[Bus] Ignoring malformed notification on {channel}")
+            return
+
+        if envelope.get("node") == self.node_id:
+            return
+
+        list_id = channel[len(self.channel_prefix):]
+        asyncio.get_running_loop().create_task(
+            self._dispatch(list_id, envelope["message"])
+        )
+
+
+def create_message_bus(settings: Settings) -> MessageBus:
+    """Build the message bus selected by settings.message_bus_backend."""
+    if settings.message_bus_backend == "postgres":
+        return PostgresMessageBus(settings.get_asyncpg_dsn)
+    if settings.message_bus_backend == "memory":
+        return InMemoryMessageBus()
+    raise ValueError(f"Unknown message bus backend: {settings.message_bus_backend}")
@@ -2,5 +2,6 @@ from models.user import User
 from models.shopping_list import ShoppingList
 from models.list_member import ListMember
 from models.item import Item
+from models.tombstone import Tombstone
 
-__all__ = ["User", "ShoppingList", "ListMember", "Item"]
+__all__ = ["User", "ShoppingList", "ListMember", "Item", "Tombstone"]
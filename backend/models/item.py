@@ -1,21 +1,32 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, Boolean, Integer, ForeignKey, Text
+from sqlalchemy import String, DateTime, Boolean, Integer, ForeignKey, Index, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from database import Base
+from database import Base, change_xid_column
 
 
 class Item(Base):
     """Shopping list item model."""
 
     __tablename__ = "items"
+    __table_args__ = (
+        # A list's items in display order, id breaking ties for keyset pages
+        Index(
+            "ix_items_list_id_is_checked_sort_index_id",
+            "list_id", "is_checked", "sort_index", "id",
+        ),
+        # A list's items by rank (appends read the last rank)
+        Index("ix_items_list_id_rank", "list_id", "rank"),
+        # A list's items changed since a transaction (GET /sync/changes)
+        Index("ix_items_list_id_change_xid", "list_id", "change_xid"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4())
     )
     list_id: Mapped[str] = mapped_column(
-        String(36), ForeignKey("shopping_lists.id", ondelete="CASCADE"), index=True
+        String(36), ForeignKey("shopping_lists.id", ondelete="CASCADE")
     )
     name: Mapped[str] = mapped_column(String(200))
     quantity: Mapped[int] = mapped_column(Integer, default=1)
@@ -27,6 +38,11 @@ class Item(Base):
         String(36), ForeignKey("users.id"), nullable=True
     )
     sort_index: Mapped[int] = mapped_column(Integer, default=0)
+    # Fractional ordering key (see ranking.py), compared byte by byte
+    rank: Mapped[str] = mapped_column(String(collation="C"))
+    # Incremented on every change, so clients can apply field-level deltas
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    change_xid: Mapped[int] = change_xid_column()
     created_by: Mapped[str] = mapped_column(
         String(36), ForeignKey("users.id"), index=True
     )
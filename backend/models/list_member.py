@@ -1,10 +1,10 @@
 import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import String, DateTime, ForeignKey, Enum
+from sqlalchemy import String, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from database import Base
+from database import Base, change_xid_column
 
 
 class MemberRole(str, PyEnum):
@@ -17,15 +17,27 @@ class ListMember(Base):
     """List membership model - tracks who has access to which lists."""
 
     __tablename__ = "list_members"
+    __table_args__ = (
+        # One membership per user and list; covers access checks and role lookups
+        Index(
+            "uq_list_members_list_id_user_id",
+            "list_id",
+            "user_id",
+            unique=True,
+            postgresql_include=["role"],
+        ),
+        # A user's lists
+        Index("ix_list_members_user_id_list_id", "user_id", "list_id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4())
     )
     list_id: Mapped[str] = mapped_column(
-        String(36), ForeignKey("shopping_lists.id"), index=True
+        String(36), ForeignKey("shopping_lists.id")
     )
     user_id: Mapped[str] = mapped_column(
-        String(36), ForeignKey("users.id"), index=True
+        String(36), ForeignKey("users.id")
     )
     role: Mapped[MemberRole] = mapped_column(
         Enum(MemberRole), default=MemberRole.viewer
@@ -33,6 +45,7 @@ class ListMember(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow
     )
+    change_xid: Mapped[int] = change_xid_column()
 
     # Relationships
     shopping_list: Mapped["ShoppingList"] = relationship(
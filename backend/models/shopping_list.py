@@ -1,15 +1,24 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, Boolean, ForeignKey
+from sqlalchemy import String, DateTime, Boolean, Integer, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from database import Base
+from database import Base, change_xid_column
 
 
 class ShoppingList(Base):
     """Shopping list model."""
 
     __tablename__ = "shopping_lists"
+    __table_args__ = (
+        # Non-archived lists, most recently updated first
+        Index(
+            "ix_shopping_lists_active_updated_at",
+            text("updated_at DESC"),
+            "id",
+            postgresql_where=text("NOT is_archived"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4())
@@ -28,6 +37,17 @@ class ShoppingList(Base):
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
     sort_mode: Mapped[str] = mapped_column(String(20), default="chronological")
+    # Sort index the next added item gets; batches reserve a range at once
+    next_sort_index: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    # Maintained by every item write, in its transaction (repair with
+    # scripts/repair_list_counters.py)
+    item_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    checked_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Incremented on every change to the list or its items
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    # When an item was last added, changed or removed
+    items_updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    change_xid: Mapped[int] = change_xid_column()
 
     # Relationships
     owner: Mapped["User"] = relationship("User", back_populates="owned_lists")
@@ -0,0 +1,39 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import String, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base, change_xid_column
+
+
+class Tombstone(Base):
+    """
+    Record of a deleted list, item or membership, so GET /sync/changes can
+    tell clients to drop it.
+
+    An item tombstone goes to the members of its list. A deleted list has
+    no members left to look up, so it gets one tombstone per former member
+    (user_id). A membership tombstone goes to the list's remaining members
+    and to the removed user, until the user is added back to the list.
+    """
+
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_list_id_change_xid", "list_id", "change_xid"),
+        Index("ix_tombstones_user_id_change_xid", "user_id", "change_xid"),
+    )
+
+    id: Mapped[str] = mapped_column(
+        String(36), primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    # "list", "item" or "member"
+    entity_type: Mapped[str] = mapped_column(String(10))
+    # The member's user id for "member"
+    entity_id: Mapped[str] = mapped_column(String(36))
+    list_id: Mapped[str] = mapped_column(String(36))
+    # Recipient of a "list" tombstone, or the removed user of a "member" one
+    user_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow
+    )
+    change_xid: Mapped[int] = change_xid_column()
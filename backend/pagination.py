@@ -0,0 +1,47 @@
+"""
+Opaque cursors for keyset pagination.
+
+A page ends with the sort key of its last row; the next page starts strictly
+after that key, reading on along an index in the same order instead of
+skipping OFFSET rows, so every page costs the same however deep the client
+has scrolled. Clients get the key as an opaque URL-safe string and hand it
+back unchanged.
+"""
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values: str | int | bool | datetime) -> str:
+    """Encode a row's sort key as a cursor."""
+    payload = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """
+    Decode a cursor into a sort key with the given value types.
+
+    Raises ValueError if the cursor was not made by encode_cursor with values
+    of those types.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Malformed cursor")
+
+    key = []
+    for value, value_type in zip(values, types):
+        if value_type is datetime and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        # bool is a subclass of int; don't accept one for the other
+        elif type(value) is not value_type:
+            raise ValueError("Malformed cursor")
+        key.append(value)
+    return tuple(key)
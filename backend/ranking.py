@@ -0,0 +1,107 @@
+"""
+Fractional rank keys for ordering items by drag and drop.
+
+A rank is a string of base-62 digits compared byte by byte (the column uses
+the "C" collation). Because there is always another string between two
+distinct ranks, moving an item only rewrites that item's rank; no other item
+is renumbered. Ranks never end in the lowest digit, so there is always room
+before any rank as well.
+
+Keys grow by about one digit each time an item is placed between two
+neighbours whose keys are already adjacent. Lists whose keys get too long
+are rebalanced in the background with spread_ranks.
+"""
+from sqlalchemy import case, func
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+MIDDLE = DIGITS[BASE // 2]
+LAST = DIGITS[-1]
+# Extends a rank whose digits are all LAST, leaving the most increments
+EXTEND = DIGITS[1]
+
+
+def rank_after(rank: str | None) -> str:
+    """
+    A short rank after the given one, for appending to the end of a list.
+
+    Increments the first digit that can be incremented, so appends stay one
+    or two digits long until the leading digits reach the top of the range.
+    """
+    if rank is None:
+        return MIDDLE
+    prefix = len(rank) - len(rank.lstrip(LAST))
+    if prefix == len(rank):
+        return rank + EXTEND
+    return rank[:prefix] + DIGITS[DIGITS.index(rank[prefix]) + 1]
+
+
+def rank_after_sql(rank):
+    """rank_after as a SQL expression, for computing a rank inside an INSERT."""
+    last_run = func.substring(rank, f"^{LAST}*")
+    return case(
+        (rank.is_(None), MIDDLE),
+        (func.length(last_run) == func.length(rank), rank.concat(EXTEND)),
+        else_=last_run.concat(
+            func.translate(
+                func.substr(rank, func.length(last_run) + 1, 1), DIGITS[:-1], DIGITS[1:]
+            )
+        ),
+    )
+
+
+def rank_between(before: str | None, after: str | None) -> str:
+    """
+    A rank strictly between two ranks; None stands for the start or end.
+
+    Raises ValueError if before does not sort before after.
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"{before!r} does not sort before {after!r}")
+    if after is None:
+        return rank_after(before)
+    return _midpoint(before or "", after)
+
+
+def _midpoint(low: str, high: str | None) -> str:
+    # low may be "" (the start); high None means the end
+    if high is not None:
+        # Skip the common prefix (low is padded with the lowest digit)
+        n = 0
+        while n < len(high) and (low[n] if n < len(low) else DIGITS[0]) == high[n]:
+            n += 1
+        if n > 0:
+            return high[:n] + _midpoint(low[n:], high[n:])
+
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit + 1) // 2]
+    # Adjacent digits: a one-digit prefix of high is already between them
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def spread_ranks(count: int) -> list[str]:
+    """
+    count increasing ranks of equal length, spaced evenly over the lower half
+    of the key space so items appended afterwards get short ranks again.
+    """
+    width = 1
+    while BASE ** width // 2 < 2 * (count + 1):
+        width += 1
+    span = BASE ** width // 2
+
+    ranks = []
+    for i in range(1, count + 1):
+        value = i * span // (count + 1)
+        # Values are at least two apart, so this never collides
+        if value % BASE == 0:
+            value += 1
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append("".join(reversed(digits)))
+    return ranks
@@ -1,160 +1,460 @@
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    Integer, Row, String, bindparam, case, cast, delete, func, insert, literal, select,
+    tuple_, update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 
+from database import UPDATE_RETURNING_OPTIONS
 from models.item import Item
+from models.shopping_list import ShoppingList
+from models.tombstone import Tombstone
+from ranking import rank_after_sql, spread_ranks
 from schemas.item import ItemCreate, ItemUpdate
 
 
 class ItemRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create(self, list_id: str, item_data: ItemCreate, user_id: str) -> Item:
-        # Get the next sort index
-        max_sort = self.db.query(func.max(Item.sort_index)).filter(
-            Item.list_id == list_id
-        ).scalar() or 0
-
-        item = Item(
-            list_id=list_id,
-            name=item_data.name,
-            quantity=item_data.quantity,
-            unit=item_data.unit,
-            note=item_data.note,
-            sort_index=max_sort + 1,
-            created_by=user_id,
-        )
-        self.db.add(item)
-        self.db.commit()
-        self.db.refresh(item)
-        return item
+    async def create(self, list_id: str, item_data: ItemCreate, user_id: str) -> Item | None:
+        """
+        Insert an item at the end of the list, returning the new row (None if
+        the list no longer exists).
+        """
+        sort_index = await self._allocate_sort_indices(list_id, 1)
+        if sort_index is None:
+            return None
 
-    def create_batch(
-        self, list_id: str, names: list[str], user_id: str
-    ) -> list[Item]:
-        # Get the next sort index
-        max_sort = self.db.query(func.max(Item.sort_index)).filter(
-            Item.list_id == list_id
-        ).scalar() or 0
-
-        items = []
-        for i, name in enumerate(names):
-            item = Item(
+        item = await self.db.scalar(
+            insert(Item)
+            .values(
                 list_id=list_id,
-                name=name.strip(),
-                quantity=1,
-                sort_index=max_sort + i + 1,
+                name=item_data.name,
+                quantity=item_data.quantity,
+                unit=item_data.unit,
+                note=item_data.note,
+                sort_index=sort_index,
+                rank=self._next_rank(list_id),
                 created_by=user_id,
             )
-            self.db.add(item)
-            items.append(item)
+            .returning(Item)
+        )
 
-        self.db.commit()
-        for item in items:
-            self.db.refresh(item)
+        await self.db.commit()
+        return item
+
+    async def create_batch(
+        self, list_id: str, names: list[str], user_id: str
+    ) -> list[Item] | None:
+        """
+        Insert items at the end of the list in one statement, in order (None
+        if the list no longer exists).
+        """
+        next_sort_index = await self._allocate_sort_indices(list_id, len(names))
+        if next_sort_index is None:
+            return None
+
+        # One rank after the list's last, extended with evenly spread suffixes
+        next_rank = self._next_rank(list_id)
+        suffixes = spread_ranks(len(names))
+        result = await self.db.scalars(
+            insert(Item)
+            .values([
+                {
+                    "list_id": list_id,
+                    "name": name.strip(),
+                    "quantity": 1,
+                    "sort_index": next_sort_index + i,
+                    "rank": next_rank + suffixes[i],
+                    "created_by": user_id,
+                }
+                for i, name in enumerate(names)
+            ])
+            .returning(Item)
+        )
+        items = sorted(result, key=lambda item: item.sort_index)
+
+        await self.db.commit()
         return items
 
-    def get_by_id(self, item_id: str) -> Item | None:
-        return self.db.query(Item).filter(Item.id == item_id).first()
+    async def _allocate_sort_indices(self, list_id: str, count: int) -> int | None:
+        """
+        Reserve count consecutive sort indices from the list's counter and
+        count the new items on the list, returning the first index (None if
+        the list does not exist).
 
-    def get_all_for_list(self, list_id: str) -> list[Item]:
-        return (
-            self.db.query(Item)
-            .filter(Item.list_id == list_id)
-            .order_by(Item.is_checked, Item.sort_index)
-            .all()
+        The UPDATE locks the list row until commit, so concurrent adds to one
+        list take turns: each gets its own range, and the INSERT that follows
+        (a new statement, with a new snapshot) sees the previous add's items
+        when it computes the next rank.
+        """
+        return await self.db.scalar(
+            update(ShoppingList)
+            .where(ShoppingList.id == list_id)
+            .values(
+                next_sort_index=ShoppingList.next_sort_index + count,
+                **_counter_values(items=count),
+            )
+            .returning(ShoppingList.next_sort_index - count)
+        )
+
+    async def _update_counters(
+        self,
+        list_id: str,
+        items: int = 0,
+        checked: int = 0,
+        sort_index: int | None = None,
+    ) -> None:
+        """
+        Record an item write on the list, in the write's transaction: apply
+        the item and checked count deltas, bump the version, and keep
+        next_sort_index above a sort index a client assigned.
+        """
+        values = _counter_values(items, checked)
+        if sort_index is not None:
+            values["next_sort_index"] = func.greatest(
+                ShoppingList.next_sort_index, sort_index + 1
+            )
+        await self.db.execute(
+            update(ShoppingList).where(ShoppingList.id == list_id).values(**values)
         )
 
-    def update(self, item: Item, update_data: ItemUpdate) -> Item:
-        update_dict = update_data.model_dump(exclude_unset=True)
-        for field, value in update_dict.items():
-            setattr(item, field, value)
+    def _lock_checked(self, list_id: str, item_ids: list[str]):
+        """
+        CTE of (id, is_checked) for the given items of the list, locking the
+        rows, so an UPDATE ... FROM it can return each item's checked state
+        from before the update.
+        """
+        return (
+            select(Item.id, Item.is_checked)
+            .where(Item.id.in_(item_ids), Item.list_id == list_id)
+            .with_for_update()
+            .cte("previous")
+        )
 
-        self.db.commit()
-        self.db.refresh(item)
-        return item
+    def _next_rank(self, list_id: str):
+        """Expression for a rank after the list's last item (an index lookup)."""
+        return rank_after_sql(
+            select(func.max(Item.rank)).where(Item.list_id == list_id).scalar_subquery()
+        )
 
-    def toggle_checked(self, item: Item, user_id: str) -> Item:
-        item.is_checked = not item.is_checked
-        if item.is_checked:
-            item.checked_at = datetime.utcnow()
-            item.checked_by = user_id
-        else:
-            item.checked_at = None
-            item.checked_by = None
-
-        self.db.commit()
-        self.db.refresh(item)
-        return item
+    async def get_by_id(self, item_id: str) -> Item | None:
+        return await self.db.get(Item, item_id)
 
-    def delete(self, item: Item) -> None:
-        self.db.delete(item)
-        self.db.commit()
+    async def get_all_for_list(
+        self,
+        list_id: str,
+        limit: int | None = None,
+        after: tuple[bool, int, str] | None = None,
+        unchecked_only: bool = False,
+        columns: list[str] | None = None,
+    ) -> list[Item] | list[Row]:
+        """
+        A list's items in display order (unchecked first, then by sort_index
+        and id), optionally a page at a time.
 
-    def delete_checked(self, list_id: str) -> int:
-        count = (
-            self.db.query(Item)
-            .filter(Item.list_id == list_id, Item.is_checked == True)
-            .delete()
+        after is the (is_checked, sort_index, id) of the last item on the
+        previous page; pages are range scans of
+        ix_items_list_id_is_checked_sort_index_id. With columns, returns
+        rows of just those columns instead of Item objects.
+        """
+        entities = [getattr(Item, name) for name in columns] if columns else [Item]
+        query = (
+            select(*entities)
+            .where(Item.list_id == list_id)
+            .order_by(Item.is_checked, Item.sort_index, Item.id)
+            .limit(limit)
         )
-        self.db.commit()
-        return count
+        if unchecked_only:
+            query = query.where(Item.is_checked == False)  # noqa: E712
+        if after is not None:
+            query = query.where(tuple_(Item.is_checked, Item.sort_index, Item.id) > tuple_(*after))
 
-    def batch_check(
-        self, list_id: str, item_ids: list[str], checked: bool, user_id: str
-    ) -> int:
-        items = (
-            self.db.query(Item)
-            .filter(Item.id.in_(item_ids), Item.list_id == list_id)
-            .all()
+        if columns:
+            return list(await self.db.execute(query))
+        return list(await self.db.scalars(query))
+
+    async def update(
+        self, list_id: str, item_id: str, update_data: ItemUpdate
+    ) -> Item | None:
+        """Apply the fields set on update_data in one UPDATE, returning the new row."""
+        values = update_data.model_dump(exclude_unset=True)
+        previous = self._lock_checked(list_id, [item_id])
+        row = (
+            await self.db.execute(
+                update(Item)
+                .where(Item.id == previous.c.id)
+                .values(**values, version=Item.version + 1)
+                .returning(
+                    Item,
+                    previous.c.is_checked.label("was_checked"),
+                    Item.is_checked.label("is_checked_now"),
+                ),
+                execution_options=UPDATE_RETURNING_OPTIONS,
+            )
+        ).first()
+        if row is None:
+            await self.db.commit()
+            return None
+
+        # The delta comes from the returned columns, never the ORM object,
+        # so it matches what the UPDATE actually wrote
+        await self._update_counters(
+            list_id,
+            checked=row.is_checked_now - row.was_checked,
+            sort_index=values.get("sort_index"),
         )
+        await self.db.commit()
+        return row.Item
 
+    async def toggle_checked(self, list_id: str, item_id: str, user_id: str) -> Item | None:
+        """Flip an item's checked state in one UPDATE, returning the new row."""
         now = datetime.utcnow()
-        for item in items:
-            item.is_checked = checked
-            item.checked_at = now if checked else None
-            item.checked_by = user_id if checked else None
-            item.updated_at = now
+        # SET expressions read the row as it was before the update
+        row = (
+            await self.db.execute(
+                update(Item)
+                .where(Item.id == item_id, Item.list_id == list_id)
+                .values(
+                    is_checked=~Item.is_checked,
+                    checked_at=case((Item.is_checked, None), else_=now),
+                    checked_by=case((Item.is_checked, None), else_=user_id),
+                    updated_at=now,
+                    version=Item.version + 1,
+                )
+                .returning(Item, Item.is_checked.label("is_checked_now")),
+                execution_options=UPDATE_RETURNING_OPTIONS,
+            )
+        ).first()
+        if row is None:
+            await self.db.commit()
+            return None
 
-        self.db.commit()
-        return len(items)
+        await self._update_counters(list_id, checked=1 if row.is_checked_now else -1)
+        await self.db.commit()
+        return row.Item
 
-    def batch_delete(self, list_id: str, item_ids: list[str]) -> int:
-        count = (
-            self.db.query(Item)
-            .filter(Item.id.in_(item_ids), Item.list_id == list_id)
-            .delete(synchronize_session=False)
+    async def delete(self, item: Item) -> None:
+        # Empty if a concurrent request deleted it first
+        deleted = await self._delete_recorded(item.list_id, Item.id == item.id)
+        if deleted:
+            await self._update_counters(
+                item.list_id, items=-1, checked=-deleted[0].is_checked
+            )
+        await self.db.commit()
+
+    async def delete_checked(self, list_id: str) -> int:
+        deleted = await self._delete_recorded(list_id, Item.is_checked == True)  # noqa: E712
+        if deleted:
+            await self._update_counters(list_id, items=-len(deleted), checked=-len(deleted))
+        await self.db.commit()
+        return len(deleted)
+
+    async def _delete_recorded(self, list_id: str, *criteria) -> list[Row]:
+        """
+        Delete the list's items matching criteria and leave a tombstone for
+        each, in one statement, returning (id, is_checked) of each deleted
+        item.
+        """
+        deleted = (
+            delete(Item)
+            .where(Item.list_id == list_id, *criteria)
+            .returning(Item.id, Item.is_checked)
+            .cte("deleted")
         )
-        self.db.commit()
-        return count
+        recorded = insert(Tombstone).from_select(
+            ["id", "entity_type", "entity_id", "list_id", "deleted_at"],
+            select(
+                cast(func.gen_random_uuid(), String),
+                literal("item"),
+                deleted.c.id,
+                literal(list_id),
+                literal(datetime.utcnow()),
+            ),
+        )
+        # A data-modifying CTE runs whether or not the query reads it
+        result = await self.db.execute(
+            select(deleted.c.id, deleted.c.is_checked).add_cte(recorded.cte("recorded"))
+        )
+        return list(result)
+
+    async def batch_check(
+        self, list_id: str, item_ids: list[str], checked: bool, user_id: str
+    ) -> list[Item]:
+        """Check or uncheck items in one UPDATE, returning the updated rows."""
+        now = datetime.utcnow()
+        previous = self._lock_checked(list_id, item_ids)
+        result = await self.db.execute(
+            update(Item)
+            .where(Item.id == previous.c.id)
+            .values(
+                is_checked=checked,
+                checked_at=now if checked else None,
+                checked_by=user_id if checked else None,
+                updated_at=now,
+                version=Item.version + 1,
+            )
+            .returning(Item, previous.c.is_checked.label("was_checked")),
+            execution_options=UPDATE_RETURNING_OPTIONS,
+        )
+        rows = list(result)
+        if rows:
+            flipped = sum(row.was_checked != checked for row in rows)
+            await self._update_counters(list_id, checked=flipped if checked else -flipped)
+
+        await self.db.commit()
+        return [row.Item for row in rows]
+
+    async def batch_delete(self, list_id: str, item_ids: list[str]) -> int:
+        deleted = await self._delete_recorded(list_id, Item.id.in_(item_ids))
+        if deleted:
+            await self._update_counters(
+                list_id,
+                items=-len(deleted),
+                checked=-sum(row.is_checked for row in deleted),
+            )
+        await self.db.commit()
+        return len(deleted)
 
-    def bulk_update_sort_indices(
+    async def bulk_update_sort_indices(
         self, list_id: str, reorder_data: list[dict]
-    ) -> int:
+    ) -> list[Row]:
         """
-        Bulk update sort_index for multiple items.
+        Bulk update sort_index for multiple items in one UPDATE.
+
+        The new indices are joined in with unnest (see _unnest). Entries for
+        items that are not in the list are ignored.
 
         Args:
             list_id: The list ID
             reorder_data: List of dicts with 'item_id' and 'sort_index'
 
         Returns:
-            Number of items updated
+            (id, sort_index, version) of each updated item
         """
-        updated_count = 0
-        now = datetime.utcnow()
+        new_order = _unnest(
+            [entry["item_id"] for entry in reorder_data],
+            "sort_index",
+            [entry["sort_index"] for entry in reorder_data],
+            Integer,
+        )
+        result = await self.db.execute(
+            update(Item)
+            .where(Item.id == new_order.c.item_id, Item.list_id == list_id)
+            .values(
+                sort_index=new_order.c.sort_index,
+                updated_at=datetime.utcnow(),
+                version=Item.version + 1,
+            )
+            .returning(Item.id, Item.sort_index, Item.version),
+            execution_options={"synchronize_session": False},
+        )
+        rows = list(result)
+        if rows:
+            await self._update_counters(
+                list_id, sort_index=max(row.sort_index for row in rows)
+            )
+
+        await self.db.commit()
+        return rows
 
-        for entry in reorder_data:
-            item = (
-                self.db.query(Item)
-                .filter(Item.id == entry["item_id"], Item.list_id == list_id)
-                .first()
+    async def lock_ranks(self, list_id: str, item_ids: list[str]) -> dict[str, str]:
+        """
+        Ranks of the given items in the list, locking their rows until commit.
+
+        Rows are locked in rank order, as rebalance_ranks does, so a move and
+        a rebalance of the same list wait for each other instead of
+        deadlocking.
+        """
+        result = await self.db.execute(
+            select(Item.id, Item.rank)
+            .where(Item.id.in_(item_ids), Item.list_id == list_id)
+            .order_by(Item.rank, Item.id)
+            .with_for_update()
+        )
+        return {row.id: row.rank for row in result}
+
+    async def set_rank(self, list_id: str, item_id: str, rank: str) -> Item | None:
+        """Move an item to a new rank in one UPDATE, returning the new row."""
+        result = await self.db.scalars(
+            update(Item)
+            .where(Item.id == item_id, Item.list_id == list_id)
+            .values(
+                rank=rank,
+                updated_at=datetime.utcnow(),
+                version=Item.version + 1,
+            )
+            .returning(Item),
+            execution_options=UPDATE_RETURNING_OPTIONS,
+        )
+        item = result.first()
+        if item is not None:
+            await self._update_counters(list_id)
+
+        await self.db.commit()
+        return item
+
+    async def rebalance_ranks(self, list_id: str) -> list[Row]:
+        """
+        Give every item in the list a new, short rank, keeping their order.
+
+        Returns:
+            (id, rank, version) of each updated item
+        """
+        item_ids = list(
+            await self.db.scalars(
+                select(Item.id)
+                .where(Item.list_id == list_id)
+                .order_by(Item.rank, Item.id)
+                .with_for_update()
+            )
+        )
+        new_ranks = _unnest(item_ids, "rank", spread_ranks(len(item_ids)), String)
+        result = await self.db.execute(
+            update(Item)
+            .where(Item.id == new_ranks.c.item_id, Item.list_id == list_id)
+            .values(
+                rank=new_ranks.c.rank,
+                updated_at=datetime.utcnow(),
+                version=Item.version + 1,
             )
-            if item:
-                item.sort_index = entry["sort_index"]
-                item.updated_at = now
-                updated_count += 1
+            .returning(Item.id, Item.rank, Item.version),
+            execution_options={"synchronize_session": False},
+        )
+        rows = list(result)
+        if rows:
+            await self._update_counters(list_id)
+
+        await self.db.commit()
+        return rows
 
-        self.db.commit()
-        return updated_count
+
+def _counter_values(items: int = 0, checked: int = 0) -> dict:
+    """SET values recording an item write on its list."""
+    return {
+        "item_count": ShoppingList.item_count + items,
+        "checked_count": ShoppingList.checked_count + checked,
+        "version": ShoppingList.version + 1,
+        "items_updated_at": datetime.utcnow(),
+        # Item writes are not edits of the list itself
+        "updated_at": ShoppingList.updated_at,
+    }
+
+
+def _unnest(item_ids: list[str], name: str, values: list, value_type):
+    """
+    (item_id, <name>) pairs as a table, from two array parameters.
+
+    The SQL is the same for any number of pairs, so it stays in the prepared
+    statement cache.
+    """
+    return (
+        func.unnest(
+            bindparam("item_ids", item_ids, ARRAY(String)),
+            bindparam(f"{name}s", values, ARRAY(value_type)),
+        )
+        .table_valued("item_id", name)
+        .render_derived()
+    )
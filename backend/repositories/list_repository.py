@@ -1,82 +1,359 @@
-from sqlalchemy.orm import Session
+import uuid
+from datetime import datetime
+from sqlalchemy import Row, String, and_, cast, delete, func, insert, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from database import UPDATE_RETURNING_OPTIONS
+from models.item import Item
 from models.shopping_list import ShoppingList
 from models.list_member import ListMember, MemberRole
+from models.tombstone import Tombstone
+from models.user import User
 from schemas.list import ListCreate, ListUpdate
 
 
 class ListRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create(self, list_data: ListCreate, owner_id: str) -> ShoppingList:
-        shopping_list = ShoppingList(
-            owner_id=owner_id,
-            name=list_data.name,
-            color=list_data.color or "#4CAF50",
-            icon=list_data.icon or "shopping_cart",
+    async def create(self, list_data: ListCreate, owner_id: str) -> ShoppingList:
+        shopping_list = await self.db.scalar(
+            insert(ShoppingList)
+            .values(
+                owner_id=owner_id,
+                name=list_data.name,
+                color=list_data.color or "#4CAF50",
+                icon=list_data.icon or "shopping_cart",
+            )
+            .returning(ShoppingList)
         )
-        self.db.add(shopping_list)
-        self.db.flush()
+        await self._add_owner(shopping_list.id, owner_id)
 
-        # Auto-add owner as member with owner role
-        member = ListMember(
-            list_id=shopping_list.id,
-            user_id=owner_id,
-            role=MemberRole.owner,
+        await self.db.commit()
+        return shopping_list
+
+    async def _add_owner(self, list_id: str, owner_id: str) -> None:
+        """Add the owner as member with owner role."""
+        await self.db.execute(
+            insert(ListMember).values(
+                list_id=list_id,
+                user_id=owner_id,
+                role=MemberRole.owner,
+            )
         )
-        self.db.add(member)
-        self.db.commit()
-        self.db.refresh(shopping_list)
 
-        return shopping_list
+    async def get_by_id(self, list_id: str) -> ShoppingList | None:
+        return await self.db.get(ShoppingList, list_id)
+
+    async def get_version(self, list_id: str) -> int | None:
+        return await self.db.scalar(
+            select(ShoppingList.version).where(ShoppingList.id == list_id)
+        )
+
+    async def get_member_role(
+        self, list_id: str, user_id: str
+    ) -> tuple[bool, MemberRole | None]:
+        """
+        Whether a list exists, and the user's role on it (None when not a
+        member), in one query on the list's primary key and the membership
+        index.
+        """
+        row = (
+            await self.db.execute(
+                select(ShoppingList.id, ListMember.role)
+                .outerjoin(
+                    ListMember,
+                    (ListMember.list_id == ShoppingList.id)
+                    & (ListMember.user_id == user_id),
+                )
+                .where(ShoppingList.id == list_id)
+            )
+        ).first()
+        if row is None:
+            return False, None
+        return True, row.role
+
+    async def get_members(self, list_id: str) -> list[Row]:
+        """(user_id, name, role, created_at) of every member, in one joined query."""
+        result = await self.db.execute(
+            select(ListMember.user_id, User.name, ListMember.role, ListMember.created_at)
+            .join(User, User.id == ListMember.user_id)
+            .where(ListMember.list_id == list_id)
+            .order_by(ListMember.created_at)
+        )
+        return list(result)
+
+    async def get_member(self, list_id: str, user_id: str) -> ListMember | None:
+        return await self.db.scalar(
+            select(ListMember).where(
+                ListMember.list_id == list_id,
+                ListMember.user_id == user_id,
+            )
+        )
 
-    def get_by_id(self, list_id: str) -> ShoppingList | None:
-        return self.db.query(ShoppingList).filter(ShoppingList.id == list_id).first()
+    async def add_member(
+        self, list_id: str, user_id: str, role: str
+    ) -> ListMember | None:
+        """
+        Add a member, or return None if the user already is one.
 
-    def get_all_for_user(self, user_id: str) -> list[ShoppingList]:
-        return (
-            self.db.query(ShoppingList)
+        Clears the tombstone of any earlier removal of the user from the
+        list in the same statement: GET /sync/changes applies deletions
+        after upserts, so a client catching up on both would otherwise drop
+        the membership again.
+        """
+        cleared = (
+            delete(Tombstone)
+            .where(
+                Tombstone.entity_type == "member",
+                Tombstone.list_id == list_id,
+                Tombstone.entity_id == user_id,
+            )
+            .cte("cleared")
+        )
+        member = await self.db.scalar(
+            pg_insert(ListMember)
+            .add_cte(cleared)
+            # A statement with a CTE skips the columns' Python-side defaults
+            .values(
+                id=str(uuid.uuid4()),
+                list_id=list_id,
+                user_id=user_id,
+                role=role,
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing(index_elements=["list_id", "user_id"])
+            .returning(ListMember)
+        )
+        await self.db.commit()
+        return member
+
+    async def remove_member(self, list_id: str, user_id: str) -> bool:
+        """
+        Remove a member, leaving a tombstone for the list's members and the
+        removed user. Returns False if the user was not a member.
+        """
+        removed = await self.db.scalar(
+            delete(ListMember)
+            .where(ListMember.list_id == list_id, ListMember.user_id == user_id)
+            .returning(ListMember.id),
+            execution_options={"synchronize_session": False},
+        )
+        if removed is not None:
+            await self.db.execute(
+                insert(Tombstone).values(
+                    entity_type="member",
+                    entity_id=user_id,
+                    list_id=list_id,
+                    user_id=user_id,
+                )
+            )
+        await self.db.commit()
+        return removed is not None
+
+    async def update_member_role(
+        self, list_id: str, user_id: str, role: str
+    ) -> Row | None:
+        """
+        Change a non-owner member's role, returning (user_id, name, role,
+        created_at), or None if there is no such non-owner member.
+        """
+        result = await self.db.execute(
+            update(ListMember)
+            .where(
+                ListMember.list_id == list_id,
+                ListMember.user_id == user_id,
+                ListMember.role != MemberRole.owner,
+                User.id == ListMember.user_id,
+            )
+            .values(role=role)
+            .returning(ListMember.user_id, User.name, ListMember.role, ListMember.created_at),
+            execution_options={"synchronize_session": False},
+        )
+        row = result.first()
+        await self.db.commit()
+        return row
+
+    async def get_all_for_user(self, user_id: str) -> list[ShoppingList]:
+        result = await self.db.scalars(
+            select(ShoppingList)
             .join(ListMember, ShoppingList.id == ListMember.list_id)
-            .filter(ListMember.user_id == user_id)
-            .filter(ShoppingList.is_archived == False)
+            .where(ListMember.user_id == user_id)
+            .where(ShoppingList.is_archived == False)  # noqa: E712
             .order_by(ShoppingList.updated_at.desc())
-            .all()
         )
+        return list(result)
 
-    def update(self, shopping_list: ShoppingList, update_data: ListUpdate) -> ShoppingList:
-        update_dict = update_data.model_dump(exclude_unset=True)
-        for field, value in update_dict.items():
-            setattr(shopping_list, field, value)
+    async def get_versions_digest(self, user_id: str) -> str:
+        """
+        A digest of the (id, version) of every list get_all_for_user returns,
+        computed in the database from the membership index and list keys.
+        """
+        entry = func.concat(ShoppingList.id, ":", ShoppingList.version)
+        return await self.db.scalar(
+            select(
+                func.md5(
+                    func.coalesce(
+                        func.string_agg(entry, aggregate_order_by(",", ShoppingList.id)), ""
+                    )
+                )
+            )
+            .select_from(ShoppingList)
+            .join(ListMember, ShoppingList.id == ListMember.list_id)
+            .where(ListMember.user_id == user_id)
+            .where(ShoppingList.is_archived == False)  # noqa: E712
+        )
 
-        self.db.commit()
-        self.db.refresh(shopping_list)
+    async def get_overview_for_user(
+        self, user_id: str, limit: int, after: tuple[datetime, str] | None = None
+    ) -> list[Row]:
+        """
+        A page of the user's non-archived lists, most recently updated first,
+        with their member counts, in one query.
+
+        Rows are (ShoppingList, member_count, last_activity_at); item counts
+        are the list's own counters. after is the (updated_at, id) of the
+        last list on the previous page; the keyset condition and order follow
+        ix_shopping_lists_active_updated_at.
+        """
+        member_count = (
+            select(func.count())
+            .select_from(ListMember)
+            .where(ListMember.list_id == ShoppingList.id)
+            # The outer query joins list_members too; count all of them
+            .correlate(ShoppingList)
+            .scalar_subquery()
+        )
+
+        query = (
+            select(
+                ShoppingList,
+                member_count.label("member_count"),
+                # greatest() skips the NULL of a list whose items never changed
+                func.greatest(ShoppingList.updated_at, ShoppingList.items_updated_at)
+                .label("last_activity_at"),
+            )
+            .join(ListMember, ShoppingList.id == ListMember.list_id)
+            .where(ListMember.user_id == user_id)
+            .where(ShoppingList.is_archived == False)  # noqa: E712
+            .order_by(ShoppingList.updated_at.desc(), ShoppingList.id)
+            .limit(limit)
+        )
+        if after is not None:
+            updated_at, list_id = after
+            query = query.where(
+                or_(
+                    ShoppingList.updated_at < updated_at,
+                    and_(ShoppingList.updated_at == updated_at, ShoppingList.id > list_id),
+                )
+            )
+
+        result = await self.db.execute(query)
+        return list(result)
+
+    async def get_ids_after(self, after_id: str | None, limit: int) -> list[str]:
+        """The next limit list ids after after_id, in id order."""
+        query = select(ShoppingList.id).order_by(ShoppingList.id).limit(limit)
+        if after_id is not None:
+            query = query.where(ShoppingList.id > after_id)
+        return list(await self.db.scalars(query))
+
+    async def recount_items(self, list_ids: list[str]) -> int:
+        """
+        Recompute the lists' item and checked counters from their items,
+        returning how many had drifted.
+
+        The lists are locked before their items are counted, and item writes
+        update the list row before they commit, so every concurrent write
+        lands either before the count (and is in it) or after the repair.
+        """
+        await self.db.execute(
+            select(ShoppingList.id)
+            .where(ShoppingList.id.in_(list_ids))
+            .order_by(ShoppingList.id)
+            .with_for_update()
+        )
+        counts = (
+            select(
+                ShoppingList.id,
+                func.count(Item.id).label("item_count"),
+                func.count(Item.id).filter(Item.is_checked).label("checked_count"),
+            )
+            .outerjoin(Item, Item.list_id == ShoppingList.id)
+            .where(ShoppingList.id.in_(list_ids))
+            .group_by(ShoppingList.id)
+            .subquery("counts")
+        )
+        result = await self.db.execute(
+            update(ShoppingList)
+            .where(
+                ShoppingList.id == counts.c.id,
+                or_(
+                    ShoppingList.item_count != counts.c.item_count,
+                    ShoppingList.checked_count != counts.c.checked_count,
+                ),
+            )
+            .values(
+                item_count=counts.c.item_count,
+                checked_count=counts.c.checked_count,
+                version=ShoppingList.version + 1,
+                updated_at=ShoppingList.updated_at,
+            ),
+            execution_options={"synchronize_session": False},
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def update(self, list_id: str, update_data: ListUpdate) -> ShoppingList | None:
+        """Apply the fields set on update_data in one UPDATE, returning the new row."""
+        result = await self.db.scalars(
+            update(ShoppingList)
+            .where(ShoppingList.id == list_id)
+            .values(
+                **update_data.model_dump(exclude_unset=True),
+                version=ShoppingList.version + 1,
+            )
+            .returning(ShoppingList),
+            execution_options=UPDATE_RETURNING_OPTIONS,
+        )
+        shopping_list = result.first()
+
+        await self.db.commit()
         return shopping_list
 
-    def delete(self, shopping_list: ShoppingList) -> None:
-        self.db.delete(shopping_list)
-        self.db.commit()
+    async def delete(self, shopping_list: ShoppingList) -> None:
+        # Its memberships go with it, so each member gets their own tombstone
+        await self.db.execute(
+            insert(Tombstone).from_select(
+                ["id", "entity_type", "entity_id", "list_id", "user_id", "deleted_at"],
+                select(
+                    cast(func.gen_random_uuid(), String),
+                    literal("list"),
+                    ListMember.list_id,
+                    ListMember.list_id,
+                    ListMember.user_id,
+                    literal(datetime.utcnow()),
+                ).where(ListMember.list_id == shopping_list.id),
+            )
+        )
+        await self.db.delete(shopping_list)
+        await self.db.commit()
 
-    def duplicate(
+    async def duplicate(
         self, original: ShoppingList, new_name: str, owner_id: str
     ) -> ShoppingList:
-        new_list = ShoppingList(
-            owner_id=owner_id,
-            name=new_name,
-            color=original.color,
-            icon=original.icon,
-        )
-        self.db.add(new_list)
-        self.db.flush()
-
-        # Add owner as member with owner role
-        member = ListMember(
-            list_id=new_list.id,
-            user_id=owner_id,
-            role=MemberRole.owner,
+        new_list = await self.db.scalar(
+            insert(ShoppingList)
+            .values(
+                owner_id=owner_id,
+                name=new_name,
+                color=original.color,
+                icon=original.icon,
+            )
+            .returning(ShoppingList)
         )
-        self.db.add(member)
-        self.db.commit()
-        self.db.refresh(new_list)
+        await self._add_owner(new_list.id, owner_id)
 
+        await self.db.commit()
         return new_list
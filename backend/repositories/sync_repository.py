@@ -0,0 +1,141 @@
+from sqlalchemy import Row, or_, select, text, tuple_, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from models.item import Item
+from models.list_member import ListMember
+from models.shopping_list import ShoppingList
+from models.tombstone import Tombstone
+from models.user import User
+
+
+class SyncRepository:
+    """
+    Reads for the change feed of GET /sync/changes.
+
+    Each method returns the rows a user can see that were written by
+    transaction since or later, ordered by (change_xid, id) and starting
+    after the given (change_xid, id) key, so a feed can be read a page at a
+    time.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_horizon(self) -> int:
+        """
+        The oldest transaction still running. Every write not yet visible
+        now is by this transaction or a later one.
+        """
+        return await self.db.scalar(
+            select(text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint"))
+        )
+
+    async def get_lists(
+        self, user_id: str, since: int, after: tuple[int, str], limit: int
+    ) -> list[ShoppingList]:
+        """Lists changed since, and every list the user joined since."""
+        result = await self.db.scalars(
+            select(ShoppingList)
+            .join(ListMember, ShoppingList.id == ListMember.list_id)
+            .where(ListMember.user_id == user_id)
+            .where(or_(ShoppingList.change_xid >= since, ListMember.change_xid >= since))
+            .where(tuple_(ShoppingList.change_xid, ShoppingList.id) > tuple_(*after))
+            .order_by(ShoppingList.change_xid, ShoppingList.id)
+            .limit(limit)
+        )
+        return list(result)
+
+    async def get_members(
+        self, user_id: str, since: int, after: tuple[int, str], limit: int
+    ) -> list[Row]:
+        """
+        Memberships of the user's lists changed since, and every membership
+        of the lists they joined since, as (id, change_xid, list_id, user_id,
+        name, role, created_at).
+        """
+        mine = aliased(ListMember)
+        result = await self.db.execute(
+            select(
+                ListMember.id,
+                ListMember.change_xid,
+                ListMember.list_id,
+                ListMember.user_id,
+                User.name,
+                ListMember.role,
+                ListMember.created_at,
+            )
+            .join(mine, mine.list_id == ListMember.list_id)
+            .join(User, User.id == ListMember.user_id)
+            .where(mine.user_id == user_id)
+            .where(or_(ListMember.change_xid >= since, mine.change_xid >= since))
+            .where(tuple_(ListMember.change_xid, ListMember.id) > tuple_(*after))
+            .order_by(ListMember.change_xid, ListMember.id)
+            .limit(limit)
+        )
+        return list(result)
+
+    async def get_items(
+        self, user_id: str, since: int, after: tuple[int, str], limit: int
+    ) -> list[Item]:
+        """Items of the user's lists changed since (ix_items_list_id_change_xid)."""
+        result = await self.db.scalars(
+            select(Item)
+            .join(ListMember, Item.list_id == ListMember.list_id)
+            .where(ListMember.user_id == user_id)
+            .where(Item.change_xid >= since)
+            .where(tuple_(Item.change_xid, Item.id) > tuple_(*after))
+            .order_by(Item.change_xid, Item.id)
+            .limit(limit)
+        )
+        return list(result)
+
+    async def get_items_of_joined_lists(
+        self, user_id: str, since: int, after: tuple[int, str], limit: int
+    ) -> list[Item]:
+        """
+        Items of the lists the user joined since that were not changed
+        since (get_items returns those).
+        """
+        result = await self.db.scalars(
+            select(Item)
+            .join(ListMember, Item.list_id == ListMember.list_id)
+            .where(ListMember.user_id == user_id)
+            .where(ListMember.change_xid >= since, Item.change_xid < since)
+            .where(tuple_(Item.change_xid, Item.id) > tuple_(*after))
+            .order_by(Item.change_xid, Item.id)
+            .limit(limit)
+        )
+        return list(result)
+
+    async def get_tombstones(
+        self, user_id: str, since: int, after: tuple[int, str], limit: int
+    ) -> list[Row]:
+        """
+        Deletions since: in the user's lists, of lists they were a member
+        of, and of their own memberships.
+        """
+        my_lists = select(ListMember.list_id).where(ListMember.user_id == user_id)
+        columns = [
+            Tombstone.id,
+            Tombstone.change_xid,
+            Tombstone.entity_type,
+            Tombstone.entity_id,
+            Tombstone.list_id,
+            Tombstone.deleted_at,
+        ]
+        # One branch per index, instead of an OR that neither index can serve
+        recent = (
+            Tombstone.change_xid >= since,
+            tuple_(Tombstone.change_xid, Tombstone.id) > tuple_(*after),
+        )
+        tombstones = union(
+            select(*columns).where(Tombstone.list_id.in_(my_lists), *recent),
+            select(*columns).where(Tombstone.user_id == user_id, *recent),
+        ).subquery("tombstones")
+        result = await self.db.execute(
+            select(tombstones)
+            .order_by(tombstones.c.change_xid, tombstones.c.id)
+            .limit(limit)
+        )
+        return list(result)
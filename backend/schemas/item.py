@@ -29,6 +29,8 @@ class ItemResponse(ItemBase):
     checked_at: datetime | None
     checked_by: str | None
     sort_index: int
+    rank: str
+    version: int
     created_by: str
     created_at: datetime
     updated_at: datetime
@@ -62,3 +64,9 @@ class ItemReorderEntry(BaseModel):
 
 class ItemReorder(BaseModel):
     items: list[ItemReorderEntry] = Field(..., min_length=1)
+
+
+class ItemMove(BaseModel):
+    # Neighbours to place the item between; None means the start or end
+    after_id: str | None = None
+    before_id: str | None = None
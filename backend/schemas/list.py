@@ -17,7 +17,7 @@ class ListUpdate(BaseModel):
     color: str | None = Field(default=None, pattern=r"^#[0-9A-Fa-f]{6}$")
     icon: str | None = Field(default=None, max_length=50)
     is_archived: bool | None = None
-    sort_mode: str | None = Field(default=None, pattern=r"^(alphabetical|custom|chronological)$")
+    sort_mode: str | None = Field(default=None, pattern=r"^(alphabetical|custom|chronological|ranked)$")
 
 
 class ListDuplicate(BaseModel):
@@ -51,3 +51,17 @@ class ListResponse(ListBase):
 
     class Config:
         from_attributes = True
+
+
+class ListOverview(ListResponse):
+    item_count: int
+    checked_count: int
+    member_count: int
+    # Latest change to the list or any of its items
+    last_activity_at: datetime
+
+
+class ListOverviewPage(BaseModel):
+    lists: list[ListOverview]
+    # Pass as cursor to get the next page; None on the last page
+    next_cursor: str | None = None
@@ -2,6 +2,9 @@ from datetime import datetime
 from typing import Any, List, Literal
 from pydantic import BaseModel
 
+from schemas.item import ItemResponse
+from schemas.list import ListResponse, MemberInfo
+
 
 SyncActionType = Literal["create_list", "create_item", "update_list", "update_item", "delete_list", "delete_item"]
 SyncEntityType = Literal["list", "item"]
@@ -39,3 +42,29 @@ class BatchSyncResponse(BaseModel):
     synced_count: int
     failed_count: int
     conflict_count: int
+
+
+class SyncMember(MemberInfo):
+    """A list membership in the change feed"""
+    list_id: str
+
+
+class DeletedEntity(BaseModel):
+    """A list, item or membership deleted since the cursor"""
+    entity_type: Literal["list", "item", "member"]
+    # The member's user id for "member"
+    entity_id: str
+    list_id: str
+    deleted_at: datetime
+
+
+class ChangesResponse(BaseModel):
+    """A page of the change feed"""
+    lists: List[ListResponse]
+    members: List[SyncMember]
+    items: List[ItemResponse]
+    deleted: List[DeletedEntity]
+    # Pass back to get the next page, or the changes after this one
+    cursor: str
+    # More changes are waiting; request again right away
+    has_more: bool
@@ -0,0 +1,183 @@
+"""
+Microbenchmark for WebSocket broadcast serialization.
+
+Compares the per-subscriber CPU cost of the old broadcast path, where every
+socket re-serialized the message with send_json, against encoding the message
+once and sharing the frame with every subscriber. The serialize columns
+isolate the encoding cost; the broadcast columns time the full fan-out
+through ConnectionManager, including the hand-off to each connection's
+send queue and writer task. It also reports the frame size of each wire
+format clients can negotiate.
+
+The broadcast columns are the number to judge the fan-out by. Handing a
+frame to a writer task costs one event loop pass per broadcast, so with a
+single subscriber the new path is slower than a direct send_json; it pays
+off from a handful of subscribers up, and in exchange a slow socket no
+longer stalls the broadcast for everyone else.
+
+Run with: cd backend && uv run python scripts/benchmark_broadcast.py
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Measure fan-out itself, not the item event coalescing window
+os.environ.setdefault("WS_COALESCE_WINDOW_MS", "0")
+
+from websocket_codec import Frame, encode_message
+from websocket_manager import ConnectionManager
+
+
+class NullWebSocket:
+    """WebSocket stand-in that discards frames after they would hit the wire."""
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        pass
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+    async def send_json(self, data: dict):
+        # Same serialization Starlette's WebSocket.send_json performs
+        json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def sample_message() -> dict:
+    now = datetime.utcnow().isoformat()
+    return {
+        "type": "item_added",
+        "item": {
+            "id": str(uuid.uuid4()),
+            "list_id": str(uuid.uuid4()),
+            "name": "Organic whole milk",
+            "quantity": 2,
+            "unit": "gal",
+            "note": "The one with the blue cap",
+            "is_checked": False,
+            "checked_at": None,
+            "checked_by": None,
+            "sort_index": 42,
+            "created_by": str(uuid.uuid4()),
+            "created_at": now,
+            "updated_at": now,
+        },
+        "user_id": str(uuid.uuid4()),
+    }
+
+
+def bench_serialization(subscribers: int, rounds: int) -> tuple[float, float]:
+    """Return per-subscriber seconds for serialize-per-socket vs encode-once."""
+    message = sample_message()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _ in range(subscribers):
+            json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+    per_socket = (time.perf_counter() - start) / (rounds * subscribers)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        frame = encode_message(message)
+        for _ in range(subscribers):
+            frame  # noqa: B018 - every subscriber shares the same frame
+    encode_once = (time.perf_counter() - start) / (rounds * subscribers)
+
+    return per_socket, encode_once
+
+
+async def bench_broadcast(subscribers: int, rounds: int) -> tuple[float, float]:
+    """Return per-subscriber seconds through the real fan-out loop, old vs new."""
+    message = sample_message()
+    sockets = [NullWebSocket() for _ in range(subscribers)]
+
+    # Old path: sequential send_json on every socket
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for websocket in sockets:
+            await websocket.send_json(message)
+    legacy = (time.perf_counter() - start) / (rounds * subscribers)
+
+    # New path: encode once, enqueue, per-connection writers send.
+    # The manager logs every broadcast; keep that out of the report.
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = ConnectionManager()
+        for i, websocket in enumerate(sockets):
+            await manager.connect(websocket, "bench", f"user-{i}", f"User {i}")
+        await asyncio.sleep(0)
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await manager.broadcast("bench", message)
+            # Let the writer tasks drain their queues
+            await asyncio.sleep(0)
+        current = (time.perf_counter() - start) / (rounds * subscribers)
+
+        for websocket in sockets:
+            await manager.disconnect(websocket)
+    return legacy, current
+
+
+def frame_sizes() -> list[tuple[str, int, int]]:
+    """Return (wire format, single item bytes, 20-item batch bytes) rows."""
+    single = sample_message()
+    batch = {
+        "type": "items_added",
+        "items": [sample_message()["item"] for _ in range(20)],
+        "user_id": single["user_id"],
+    }
+    rows = []
+    for encoding in ("json", "msgpack"):
+        for compress in (False, True):
+            label = encoding + ("+deflate" if compress else "")
+            rows.append((
+                label,
+                len(Frame(single).encode(encoding, compress)),
+                len(Frame(batch).encode(encoding, compress)),
+            ))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument(
+        "--subscribers", type=int, nargs="+", default=[1, 10, 50, 200]
+    )
+    args = parser.parse_args()
+
+    print(f"{'subscribers':>11} | {'serialize (us/sub)':>25} | {'broadcast (us/sub)':>25}")
+    print(f"{'':>11} | {'per-socket':>12} {'once':>12} | {'before':>12} {'after':>12}")
+    for subscribers in args.subscribers:
+        per_socket, encode_once = bench_serialization(subscribers, args.rounds)
+        before, after = asyncio.run(bench_broadcast(subscribers, args.rounds))
+        print(
+            f"{subscribers:>11} | {per_socket * 1e6:>12.2f} {encode_once * 1e6:>12.2f}"
+            f" | {before * 1e6:>12.2f} {after * 1e6:>12.2f}"
+        )
+
+    print()
+    print(f"{'wire format':>16} | {'item frame (B)':>14} | {'20-item batch (B)':>17}")
+    for label, single, batch in frame_sizes():
+        print(f"{label:>16} | {single:>14} | {batch:>17}")
+
+
+if __name__ == "__main__":
+    main()
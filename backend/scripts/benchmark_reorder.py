@@ -0,0 +1,136 @@
+"""
+Benchmark for reordering a list's items.
+
+Times ItemRepository.bulk_update_sort_indices, which applies a full
+renumbering in one UPDATE joined against unnest arrays, against the previous
+per-row approach (one SELECT per entry plus ORM dirty tracking), for lists
+of increasing size. Each round reverses the list, so every item moves.
+
+Needs a database; it creates a throwaway user and lists and deletes them
+afterwards.
+
+Run with: cd backend && uv run python scripts/benchmark_reorder.py
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import delete, select
+
+from database import AsyncSessionLocal, async_engine
+from models.item import Item
+from models.list_member import ListMember
+from models.shopping_list import ShoppingList
+from models.user import User
+from repositories.item_repository import ItemRepository
+from repositories.list_repository import ListRepository
+from schemas.list import ListCreate
+
+
+async def per_row_reorder(db, list_id: str, reorder_data: list[dict]) -> int:
+    """The previous implementation: one SELECT per entry, then a flush of every dirty row."""
+    updated = 0
+    now = datetime.utcnow()
+    for entry in reorder_data:
+        item = await db.scalar(
+            select(Item).where(Item.id == entry["item_id"], Item.list_id == list_id)
+        )
+        if item:
+            item.sort_index = entry["sort_index"]
+            item.updated_at = now
+            item.version = Item.version + 1
+            updated += 1
+    await db.commit()
+    return updated
+
+
+async def time_rounds(reorder, list_id: str, item_ids: list[str], rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        item_ids.reverse()
+        entries = [
+            {"item_id": item_id, "sort_index": index}
+            for index, item_id in enumerate(item_ids)
+        ]
+        # A fresh session per round, as each request gets one
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await reorder(db, list_id, entries)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def bench(sizes: list[int], rounds: int, skip_per_row: bool):
+    user_id = str(uuid.uuid4())
+    async with AsyncSessionLocal() as db:
+        db.add(User(
+            id=user_id,
+            username=f"bench-reorder-{user_id[:8]}",
+            name="Reorder Benchmark",
+            password_hash="x",
+        ))
+        await db.commit()
+
+    async def set_based(db, list_id, entries):
+        return await ItemRepository(db).bulk_update_sort_indices(list_id, entries)
+
+    async def per_row(db, list_id, entries):
+        return await per_row_reorder(db, list_id, entries)
+
+    print(f"{'items':>6} | {'set-based (ms)':>21} | {'per-row (ms)':>21}")
+    print(f"{'':>6} | {'p50':>10} {'p95':>10} | {'p50':>10} {'p95':>10}")
+    try:
+        for size in sizes:
+            async with AsyncSessionLocal() as db:
+                shopping_list = await ListRepository(db).create(
+                    ListCreate(name=f"Reorder benchmark ({size})"), user_id
+                )
+                items = await ItemRepository(db).create_batch(
+                    shopping_list.id, [f"Item {i}" for i in range(size)], user_id
+                )
+            item_ids = [item.id for item in items]
+
+            columns = []
+            for reorder, skip in ((set_based, False), (per_row, skip_per_row)):
+                if skip:
+                    columns.append(f"{'-':>10} {'-':>10}")
+                    continue
+                timings = sorted(await time_rounds(reorder, shopping_list.id, item_ids, rounds))
+                p95 = timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+                columns.append(f"{statistics.median(timings) * 1000:>10.2f} {p95 * 1000:>10.2f}")
+            print(f"{size:>6} | {columns[0]} | {columns[1]}")
+    finally:
+        async with AsyncSessionLocal() as db:
+            list_ids = select(ShoppingList.id).where(ShoppingList.owner_id == user_id)
+            await db.execute(delete(Item).where(Item.list_id.in_(list_ids)))
+            await db.execute(delete(ListMember).where(ListMember.list_id.in_(list_ids)))
+            await db.execute(delete(ShoppingList).where(ShoppingList.owner_id == user_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 50, 100, 300, 1000]
+    )
+    parser.add_argument(
+        "--skip-per-row", action="store_true", help="only time the set-based reorder"
+    )
+    args = parser.parse_args()
+    asyncio.run(bench(args.sizes, args.rounds, args.skip_per_row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Recompute the item and checked counters of every shopping list.
+
+Item writes keep shopping_lists.item_count and checked_count up to date in
+their own transactions; this repairs lists whose counters drifted anyway
+(rows changed by hand, restored backups). Lists are repaired in batches,
+each locked only while its items are counted, so it is safe to run against
+a live database.
+
+Run with: cd backend && uv run python scripts/repair_list_counters.py
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import AsyncSessionLocal, async_engine
+from repositories.list_repository import ListRepository
+
+
+async def repair(batch_size: int) -> None:
+    checked = repaired = 0
+    last_id = None
+    try:
+        async with AsyncSessionLocal() as db:
+            repository = ListRepository(db)
+            while list_ids := await repository.get_ids_after(last_id, batch_size):
+                repaired += await repository.recount_items(list_ids)
+                checked += len(list_ids)
+                last_id = list_ids[-1]
+    finally:
+        await async_engine.dispose()
+    print(f"Checked {checked} lists, repaired {repaired}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--batch-size", type=int, default=500, help="lists locked and recounted at a time"
+    )
+    args = parser.parse_args()
+    asyncio.run(repair(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from fastapi import HTTPException, status
+
+from membership_cache import membership_cache
+from models.list_member import MemberRole
+from repositories.list_repository import ListRepository
+
+
+# Roles allowed to change a list's details
+EDIT_ROLES = (MemberRole.owner, MemberRole.editor)
+
+
+async def get_member_role(
+    repository: ListRepository, list_id: str, user_id: str
+) -> MemberRole:
+    """
+    The user's role on a list, from the membership cache or one query.
+
+    Raises 404 if the list does not exist and 403 if the user is not a member.
+    """
+    role = membership_cache.get(list_id, user_id)
+    if role is not None:
+        return role
+
+    exists, role = await repository.get_member_role(list_id, user_id)
+
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="List not found",
+        )
+
+    if role is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this list",
+        )
+
+    membership_cache.set(list_id, user_id, role)
+    return role
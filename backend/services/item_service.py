@@ -1,13 +1,25 @@
 import asyncio
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import get_settings
+from database import AsyncSessionLocal
+from etags import make_etag
+from pagination import decode_cursor, encode_cursor
+from ranking import rank_between
 from repositories.item_repository import ItemRepository
 from repositories.list_repository import ListRepository
-from schemas.item import ItemCreate, ItemUpdate, ItemResponse, ItemReorder
+from services.access import get_member_role
+from schemas.item import ItemCreate, ItemUpdate, ItemResponse, ItemReorder, ItemMove
 from models.item import Item
 from websocket_manager import manager
 
+settings = get_settings()
+
+
+# Fields a check/uncheck (single or batch) writes on every item
+CHECK_FIELDS = ["is_checked", "checked_at", "checked_by", "updated_at"]
+
 
 def _broadcast(list_id: str, message: dict):
     """Schedule a WebSocket broadcast on the running event loop."""
@@ -19,18 +31,66 @@ def _broadcast(list_id: str, message: dict):
         print(f"[ItemService] No running event loop, skipping broadcast: {e}")
 
 
+# Lists with a rank rebalance scheduled or running on this instance
+_rebalancing: set[str] = set()
+
+
+def _schedule_rebalance(list_id: str):
+    """Rebalance a list's ranks in the background, once at a time per list."""
+    if list_id in _rebalancing:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError as e:
+        print(f"[ItemService] No running event loop, skipping rebalance: {e}")
+        return
+    _rebalancing.add(list_id)
+    loop.create_task(_rebalance(list_id))
+
+
+async def _rebalance(list_id: str):
+    try:
+        async with AsyncSessionLocal() as db:
+            rows = await ItemRepository(db).rebalance_ranks(list_id)
+        print(f"[ItemService] Rebalanced {len(rows)} ranks for list {list_id}")
+        if rows:
+            await manager.broadcast(list_id, {
+                "type": "items_moved",
+                "items": [
+                    {"item_id": row.id, "rank": row.rank, "version": row.version}
+                    for row in rows
+                ],
+                "user_id": None,
+            })
+    except Exception as e:
+        print(f"[ItemService] Rebalance failed for list {list_id}: {e}")
+    finally:
+        _rebalancing.discard(list_id)
+
+
+def _check_rank_length(list_id: str, rank: str):
+    if len(rank) > settings.item_rank_rebalance_length:
+        _schedule_rebalance(list_id)
+
+
 class ItemService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.repository = ItemRepository(db)
         self.list_repository = ListRepository(db)
 
-    def create_item(
+    async def create_item(
         self, list_id: str, item_data: ItemCreate, user_id: str
     ) -> ItemResponse:
         # Verify list exists and user has access
-        self._verify_list_access(list_id, user_id)
+        await self._verify_list_access(list_id, user_id)
 
-        item = self.repository.create(list_id, item_data, user_id)
+        item = await self.repository.create(list_id, item_data, user_id)
+        if item is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="List not found",
+            )
+        _check_rank_length(list_id, item.rank)
         response = ItemResponse.model_validate(item)
 
         # Broadcast to WebSocket clients
@@ -42,11 +102,11 @@ class ItemService:
 
         return response
 
-    def create_items_batch(
+    async def create_items_batch(
         self, list_id: str, names: list[str], user_id: str
     ) -> list[ItemResponse]:
         # Verify list exists and user has access
-        self._verify_list_access(list_id, user_id)
+        await self._verify_list_access(list_id, user_id)
 
         # Filter out empty names
         valid_names = [n.strip() for n in names if n.strip()]
@@ -56,77 +116,176 @@ class ItemService:
                 detail="No valid item names provided",
             )
 
-        items = self.repository.create_batch(list_id, valid_names, user_id)
+        items = await self.repository.create_batch(list_id, valid_names, user_id)
+        if items is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="List not found",
+            )
+        _check_rank_length(list_id, items[-1].rank)
         responses = [ItemResponse.model_validate(item) for item in items]
 
-        # Broadcast each item creation
-        for response in responses:
-            _broadcast(list_id, {
-                "type": "item_added",
-                "item": response.model_dump(mode="json"),
-                "user_id": user_id,
-            })
+        # Broadcast all created items in a single frame
+        _broadcast(list_id, {
+            "type": "items_added",
+            "items": [response.model_dump(mode="json") for response in responses],
+            "user_id": user_id,
+        })
 
         return responses
 
-    def get_items(self, list_id: str, user_id: str) -> list[ItemResponse]:
+    async def get_items(
+        self,
+        list_id: str,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+        unchecked_only: bool = False,
+    ) -> tuple[list[ItemResponse] | list[dict], str | None]:
+        """
+        Items of a list in display order, optionally a page at a time.
+
+        Args:
+            list_id: The list ID
+            user_id: Current user ID (for access verification)
+            limit: Page size; None returns every item after the cursor
+            cursor: Next-page cursor returned with the previous page
+            fields: Return only these ItemResponse fields (and id), as dicts,
+                skipping the other columns and ItemResponse validation
+            unchecked_only: Leave out checked items
+
+        Returns:
+            The items, and the cursor of the next page (None on the last page)
+        """
         # Verify list exists and user has access
-        self._verify_list_access(list_id, user_id)
+        await self._verify_list_access(list_id, user_id)
+
+        after = None
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor, bool, int, str)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor",
+                )
+
+        columns = None
+        if fields:
+            unknown = set(fields) - ItemResponse.model_fields.keys()
+            if unknown:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+                )
+            # The cursor is made from the sort key, so it is always read
+            columns = list(dict.fromkeys(["id", *fields, "is_checked", "sort_index"]))
+
+        # One extra row tells whether there is a next page
+        rows = await self.repository.get_all_for_list(
+            list_id,
+            limit=None if limit is None else limit + 1,
+            after=after,
+            unchecked_only=unchecked_only,
+            columns=columns,
+        )
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last.is_checked, last.sort_index, last.id)
+
+        if columns is None:
+            return [ItemResponse.model_validate(item) for item in rows], next_cursor
+        returned = list(dict.fromkeys(["id", *fields]))
+        return [{name: getattr(row, name) for name in returned} for row in rows], next_cursor
+
+    async def get_items_etag(self, list_id: str, user_id: str, *variant: object) -> str:
+        """
+        ETag of get_items, from the list's version (bumped by every item
+        write) and the parameters that shape the response (variant).
 
-        items = self.repository.get_all_for_list(list_id)
-        return [ItemResponse.model_validate(item) for item in items]
+        Read before the items, so a write landing in between can only pair
+        an older ETag with newer items, which the next request refetches.
+        """
+        # Verify list exists and user has access
+        await self._verify_list_access(list_id, user_id)
 
-    def get_item(self, list_id: str, item_id: str, user_id: str) -> ItemResponse:
+        version = await self.list_repository.get_version(list_id)
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="List not found",
+            )
+        return make_etag("items", list_id, version, *variant)
+
+    async def get_item(self, list_id: str, item_id: str, user_id: str) -> ItemResponse:
         # Verify list exists and user has access
-        self._verify_list_access(list_id, user_id)
+        await self._verify_list_access(list_id, user_id)
 
-        item = self._get_item_or_404(item_id, list_id)
+        item = await self._get_item_or_404(item_id, list_id)
         return ItemResponse.model_validate(item)
 
-    def update_item(
+    async def update_item(
         self, list_id: str, item_id: str, update_data: ItemUpdate, user_id: str
     ) -> ItemResponse:
         # Verify list exists and user has access
-        self._verify_list_access(list_id, user_id)
+        await self._verify_list_access(list_id, user_id)
+
+        updated = await self.repository.update(list_id, item_id, update_data)
+
+        if not updated:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item not found",
+            )
 
-        item = self._get_item_or_404(item_id, list_id)
-        updated = self.repository.update(item, update_data)
         response = ItemResponse.model_validate(updated)
 
-        # Broadcast to WebSocket clients
+        # Broadcast to WebSocket clients (the fields written let clients that
+        # negotiated deltas receive only those)
         _broadcast(list_id, {
             "type": "item_updated",
             "item": response.model_dump(mode="json"),
+            "changed": [*update_data.model_dump(exclude_unset=True), "updated_at"],
             "user_id": user_id,
         })
 
         return response
 
-    def toggle_item(
+    async def toggle_item(
         self, list_id: str, item_id: str, user_id: str
     ) -> ItemResponse:
         # Verify list exists and user has access
-        self._verify_list_access(list_id, user_id)
+        await self._verify_list_access(list_id, user_id)
+
+        toggled = await self.repository.toggle_checked(list_id, item_id, user_id)
+
+        if not toggled:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item not found",
+            )
 
-        item = self._get_item_or_404(item_id, list_id)
-        toggled = self.repository.toggle_checked(item, user_id)
         response = ItemResponse.model_validate(toggled)
 
         # Broadcast to WebSocket clients
         _broadcast(list_id, {
             "type": "item_updated",
             "item": response.model_dump(mode="json"),
+            "changed": CHECK_FIELDS,
             "user_id": user_id,
         })
 
         return response
 
-    def delete_item(self, list_id: str, item_id: str, user_id: str) -> None:
+    async def delete_item(self, list_id: str, item_id: str, user_id: str) -> None:
         # Verify list exists and user has access
-        self._verify_list_access(list_id, user_id)
+        await self._verify_list_access(list_id, user_id)
 
-        item = self._get_item_or_404(item_id, list_id)
-        self.repository.delete(item)
+        item = await self._get_item_or_404(item_id, list_id)
+        await self.repository.delete(item)
 
         # Broadcast to WebSocket clients
         _broadcast(list_id, {
@@ -135,39 +294,41 @@ class ItemService:
             "user_id": user_id,
         })
 
-    def clear_checked(self, list_id: str, user_id: str) -> int:
+    async def clear_checked(self, list_id: str, user_id: str) -> int:
         # Verify list exists and user has access
-        self._verify_list_access(list_id, user_id)
+        await self._verify_list_access(list_id, user_id)
 
-        return self.repository.delete_checked(list_id)
+        return await self.repository.delete_checked(list_id)
 
-    def batch_check(
+    async def batch_check(
         self, list_id: str, item_ids: list[str], checked: bool, user_id: str
     ) -> int:
         # Verify list exists and user has access
-        self._verify_list_access(list_id, user_id)
+        await self._verify_list_access(list_id, user_id)
 
-        count = self.repository.batch_check(list_id, item_ids, checked, user_id)
+        items = await self.repository.batch_check(list_id, item_ids, checked, user_id)
 
-        # Broadcast update for each item
-        for item_id in item_ids:
-            item = self.repository.get_by_id(item_id)
-            if item:
-                _broadcast(list_id, {
-                    "type": "item_updated",
-                    "item": ItemResponse.model_validate(item).model_dump(mode="json"),
-                    "user_id": user_id,
-                })
+        # Broadcast all updated items in a single frame
+        if items:
+            _broadcast(list_id, {
+                "type": "items_updated",
+                "items": [
+                    ItemResponse.model_validate(item).model_dump(mode="json")
+                    for item in items
+                ],
+                "changed": [CHECK_FIELDS] * len(items),
+                "user_id": user_id,
+            })
 
-        return count
+        return len(items)
 
-    def batch_delete(self, list_id: str, item_ids: list[str], user_id: str) -> int:
+    async def batch_delete(self, list_id: str, item_ids: list[str], user_id: str) -> int:
         # Verify list exists and user has access
-        self._verify_list_access(list_id, user_id)
+        await self._verify_list_access(list_id, user_id)
 
-        return self.repository.batch_delete(list_id, item_ids)
+        return await self.repository.batch_delete(list_id, item_ids)
 
-    def reorder_items(
+    async def reorder_items(
         self, list_id: str, reorder_data: ItemReorder, user_id: str
     ) -> dict:
         """
@@ -182,7 +343,7 @@ class ItemService:
             Dict with 'success' and 'count' keys
         """
         # Verify list exists and user has access
-        self._verify_list_access(list_id, user_id)
+        await self._verify_list_access(list_id, user_id)
 
         # Convert ItemReorder entries to dict format for repository
         reorder_entries = [
@@ -190,34 +351,81 @@ class ItemService:
             for entry in reorder_data.items
         ]
 
-        count = self.repository.bulk_update_sort_indices(list_id, reorder_entries)
+        items = await self.repository.bulk_update_sort_indices(list_id, reorder_entries)
 
-        # Broadcast reorder event
+        # Broadcast reorder event, with each item's new version
         _broadcast(list_id, {
             "type": "items_reordered",
-            "items": reorder_entries,
+            "items": [
+                {"item_id": item.id, "sort_index": item.sort_index, "version": item.version}
+                for item in items
+            ],
             "user_id": user_id,
         })
 
-        return {"success": True, "count": count}
+        return {"success": True, "count": len(items)}
+
+    async def move_item(
+        self, list_id: str, item_id: str, move_data: ItemMove, user_id: str
+    ) -> ItemResponse:
+        """
+        Move an item between two others by giving it a rank between theirs.
+
+        Only the moved item is written. Its neighbours' rows stay locked until
+        the write commits, so a concurrent move or rebalance cannot change
+        their ranks in between.
+        """
+        # Verify list exists and user has access
+        await self._verify_list_access(list_id, user_id)
 
-    def _verify_list_access(self, list_id: str, user_id: str) -> None:
-        shopping_list = self.list_repository.get_by_id(list_id)
+        neighbours = [move_data.after_id, move_data.before_id]
+        if item_id in neighbours:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="An item cannot be moved next to itself",
+            )
 
-        if not shopping_list:
+        ranks = await self.repository.lock_ranks(
+            list_id, [item_id, *(n for n in neighbours if n is not None)]
+        )
+        if any(i is not None and i not in ranks for i in [item_id, *neighbours]):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="List not found",
+                detail="Item not found in this list",
             )
 
-        if not any(member.user_id == user_id for member in shopping_list.members):
+        before = ranks.get(move_data.after_id)
+        after = ranks.get(move_data.before_id)
+        if before is not None and after is not None and before >= after:
+            # Equal ranks come from concurrent moves into the same gap
+            if before == after:
+                _schedule_rebalance(list_id)
             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this list",
+                status_code=status.HTTP_409_CONFLICT,
+                detail="The neighbouring items are out of order; refresh and retry",
             )
 
-    def _get_item_or_404(self, item_id: str, list_id: str) -> Item:
-        item = self.repository.get_by_id(item_id)
+        moved = await self.repository.set_rank(list_id, item_id, rank_between(before, after))
+        _check_rank_length(list_id, moved.rank)
+        response = ItemResponse.model_validate(moved)
+
+        # Broadcast only the new rank
+        _broadcast(list_id, {
+            "type": "item_moved",
+            "item_id": moved.id,
+            "rank": moved.rank,
+            "version": moved.version,
+            "user_id": user_id,
+        })
+
+        return response
+
+    async def _verify_list_access(self, list_id: str, user_id: str) -> None:
+        # Cached per (list, user); a miss costs one indexed query
+        await get_member_role(self.list_repository, list_id, user_id)
+
+    async def _get_item_or_404(self, item_id: str, list_id: str) -> Item:
+        item = await self.repository.get_by_id(item_id)
 
         if not item:
             raise HTTPException(
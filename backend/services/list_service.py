@@ -1,220 +1,208 @@
+from datetime import datetime
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from etags import make_etag
+from membership_cache import membership_cache
+from pagination import decode_cursor, encode_cursor
 from repositories.list_repository import ListRepository
+from services.access import EDIT_ROLES, get_member_role
 from schemas.list import (
     ListCreate,
     ListUpdate,
     ListDuplicate,
     ListResponse,
+    ListOverview,
+    ListOverviewPage,
     MemberInfo,
     UpdateMemberRole,
 )
 from models.shopping_list import ShoppingList
-from models.list_member import ListMember, MemberRole
+from models.list_member import MemberRole
 from models.user import User
 
 
 class ListService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.repository = ListRepository(db)
 
-    def create_list(self, list_data: ListCreate, owner_id: str) -> ListResponse:
-        shopping_list = self.repository.create(list_data, owner_id)
+    async def create_list(self, list_data: ListCreate, owner_id: str) -> ListResponse:
+        shopping_list = await self.repository.create(list_data, owner_id)
         return ListResponse.model_validate(shopping_list)
 
-    def get_list(self, list_id: str, user_id: str) -> ListResponse:
-        shopping_list = self.repository.get_by_id(list_id)
-
-        if not shopping_list:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="List not found",
-            )
-
+    async def get_list(self, list_id: str, user_id: str) -> ListResponse:
         # Check if user has access to this list
-        if not self._user_has_access(shopping_list, user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this list",
-            )
+        await get_member_role(self.repository, list_id, user_id)
 
+        shopping_list = await self._get_list_or_404(list_id)
         return ListResponse.model_validate(shopping_list)
 
-    def get_user_lists(self, user_id: str) -> list[ListResponse]:
-        lists = self.repository.get_all_for_user(user_id)
+    async def get_user_lists(self, user_id: str) -> list[ListResponse]:
+        lists = await self.repository.get_all_for_user(user_id)
         return [ListResponse.model_validate(lst) for lst in lists]
 
-    def update_list(
+    async def get_user_lists_etag(self, user_id: str) -> str:
+        """
+        ETag of get_user_lists: changes when a list is added, edited,
+        archived or deleted, or the user joins or leaves one.
+        """
+        digest = await self.repository.get_versions_digest(user_id)
+        return make_etag("lists", digest)
+
+    async def get_user_list_overview(
+        self, user_id: str, limit: int, cursor: str | None = None
+    ) -> ListOverviewPage:
+        after = None
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor, datetime, str)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor",
+                )
+
+        # One extra row tells whether there is a next page
+        rows = await self.repository.get_overview_for_user(user_id, limit + 1, after)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1].ShoppingList
+            next_cursor = encode_cursor(last.updated_at, last.id)
+
+        return ListOverviewPage(
+            lists=[
+                ListOverview(
+                    **ListResponse.model_validate(row.ShoppingList).model_dump(),
+                    item_count=row.ShoppingList.item_count,
+                    checked_count=row.ShoppingList.checked_count,
+                    member_count=row.member_count,
+                    last_activity_at=row.last_activity_at,
+                )
+                for row in rows
+            ],
+            next_cursor=next_cursor,
+        )
+
+    async def update_list(
         self, list_id: str, update_data: ListUpdate, user_id: str
     ) -> ListResponse:
-        shopping_list = self.repository.get_by_id(list_id)
-
-        if not shopping_list:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="List not found",
-            )
+        role = await get_member_role(self.repository, list_id, user_id)
 
-        if not self._user_can_edit(shopping_list, user_id):
+        if role not in EDIT_ROLES:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have permission to edit this list",
             )
 
-        updated = self.repository.update(shopping_list, update_data)
-        return ListResponse.model_validate(updated)
-
-    def delete_list(self, list_id: str, user_id: str) -> None:
-        shopping_list = self.repository.get_by_id(list_id)
+        updated = await self.repository.update(list_id, update_data)
 
-        if not shopping_list:
+        if not updated:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="List not found",
             )
 
+        return ListResponse.model_validate(updated)
+
+    async def delete_list(self, list_id: str, user_id: str) -> None:
+        shopping_list = await self._get_list_or_404(list_id)
+
         if shopping_list.owner_id != user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only the owner can delete this list",
             )
 
-        self.repository.delete(shopping_list)
-
-    def _user_has_access(self, shopping_list: ShoppingList, user_id: str) -> bool:
-        return any(member.user_id == user_id for member in shopping_list.members)
+        await self.repository.delete(shopping_list)
+        membership_cache.invalidate(list_id)
 
-    def _user_can_edit(self, shopping_list: ShoppingList, user_id: str) -> bool:
-        for member in shopping_list.members:
-            if member.user_id == user_id and member.role.value in ("owner", "editor"):
-                return True
-        return False
-
-    def duplicate_list(
-        self, list_id: str, duplicate_data: ListDuplicate, user_id: str
-    ) -> ListResponse:
-        original = self.repository.get_by_id(list_id)
+    async def _get_list_or_404(self, list_id: str) -> ShoppingList:
+        shopping_list = await self.repository.get_by_id(list_id)
 
-        if not original:
+        if not shopping_list:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="List not found",
             )
 
-        if not self._user_has_access(original, user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this list",
-            )
+        return shopping_list
+
+    async def duplicate_list(
+        self, list_id: str, duplicate_data: ListDuplicate, user_id: str
+    ) -> ListResponse:
+        await get_member_role(self.repository, list_id, user_id)
+
+        original = await self._get_list_or_404(list_id)
 
         new_name = duplicate_data.name or f"{original.name} (Copy)"
-        new_list = self.repository.duplicate(original, new_name, user_id)
+        new_list = await self.repository.duplicate(original, new_name, user_id)
 
         return ListResponse.model_validate(new_list)
 
-    def get_list_members(self, list_id: str, user_id: str) -> list[MemberInfo]:
-        shopping_list = self.repository.get_by_id(list_id)
+    async def get_list_members(self, list_id: str, user_id: str) -> list[MemberInfo]:
+        await get_member_role(self.repository, list_id, user_id)
 
-        if not shopping_list:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="List not found",
-            )
-
-        if not self._user_has_access(shopping_list, user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this list",
+        return [
+            MemberInfo(
+                id=member.user_id,
+                name=member.name,
+                avatar=None,
+                role=member.role,
+                created_at=member.created_at,
             )
+            for member in await self.repository.get_members(list_id)
+        ]
 
-        members = self.repository.db.query(ListMember).filter(
-            ListMember.list_id == list_id
-        ).all()
-
-        member_infos = []
-        for member in members:
-            user = self.repository.db.query(User).filter(User.id == member.user_id).first()
-            if user:
-                member_infos.append(
-                    MemberInfo(
-                        id=member.user_id,
-                        name=user.name,
-                        avatar=None,
-                        role=member.role,
-                        created_at=member.created_at,
-                    )
-                )
-
-        return member_infos
-
-    def update_member_role(
+    async def update_member_role(
         self, list_id: str, member_user_id: str, role_data: UpdateMemberRole, user_id: str
     ) -> MemberInfo:
-        shopping_list = self.repository.get_by_id(list_id)
+        role = await get_member_role(self.repository, list_id, user_id)
 
-        if not shopping_list:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="List not found",
-            )
-
-        if shopping_list.owner_id != user_id:
+        if role != MemberRole.owner:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only the owner can change member roles",
             )
 
-        member = self.repository.db.query(ListMember).filter(
-            ListMember.list_id == list_id,
-            ListMember.user_id == member_user_id,
-        ).first()
+        member = await self.repository.update_member_role(
+            list_id, member_user_id, role_data.role
+        )
 
         if not member:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Member not found in this list",
-            )
-
-        # Prevent changing owner's role
-        if member.role == MemberRole.owner:
+            # Nothing was updated: find out why
+            if not await self.repository.get_member(list_id, member_user_id):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Member not found in this list",
+                )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Cannot change the owner's role",
             )
 
-        member.role = role_data.role
-        self.repository.db.commit()
+        membership_cache.invalidate(list_id, member_user_id)
 
-        user = self.repository.db.query(User).filter(User.id == member.user_id).first()
         return MemberInfo(
             id=member.user_id,
-            name=user.name if user else "Unknown",
+            name=member.name,
             avatar=None,
             role=member.role,
             created_at=member.created_at,
         )
 
-    def remove_member(self, list_id: str, member_user_id: str, user_id: str) -> None:
-        shopping_list = self.repository.get_by_id(list_id)
-
-        if not shopping_list:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="List not found",
-            )
+    async def remove_member(self, list_id: str, member_user_id: str, user_id: str) -> None:
+        role = await get_member_role(self.repository, list_id, user_id)
 
         # Owner can remove anyone, members can only remove themselves
-        if user_id != member_user_id and shopping_list.owner_id != user_id:
+        if user_id != member_user_id and role != MemberRole.owner:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You cannot remove this member",
             )
 
-        member = self.repository.db.query(ListMember).filter(
-            ListMember.list_id == list_id,
-            ListMember.user_id == member_user_id,
-        ).first()
+        member = await self.repository.get_member(list_id, member_user_id)
 
         if not member:
             raise HTTPException(
@@ -229,60 +217,46 @@ class ListService:
                 detail="Cannot remove the list owner",
             )
 
-        self.repository.db.delete(member)
-        self.repository.db.commit()
+        await self.repository.remove_member(list_id, member_user_id)
+        membership_cache.invalidate(list_id, member_user_id)
 
-    def add_member(
+    async def add_member(
         self, list_id: str, target_user_id: str, role: str, current_user_id: str
     ) -> MemberInfo:
-        shopping_list = self.repository.get_by_id(list_id)
-
-        if not shopping_list:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="List not found",
-            )
+        current_role = await get_member_role(self.repository, list_id, current_user_id)
 
         # Only owner can add members
-        if shopping_list.owner_id != current_user_id:
+        if current_role != MemberRole.owner:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only the owner can add members",
             )
 
         # Check if user exists
-        target_user = self.repository.db.query(User).filter(User.id == target_user_id).first()
-        if not target_user:
+        target_name = await self.repository.db.scalar(
+            select(User.name).where(User.id == target_user_id)
+        )
+        if target_name is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found",
             )
 
-        # Check if user is already a member
-        existing_member = self.repository.db.query(ListMember).filter(
-            ListMember.list_id == list_id,
-            ListMember.user_id == target_user_id,
-        ).first()
+        # Add the new member (the unique membership index rejects duplicates)
+        new_member = await self.repository.add_member(list_id, target_user_id, role)
 
-        if existing_member:
+        if not new_member:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User is already a member of this list",
             )
 
-        # Add the new member
-        new_member = ListMember(
-            list_id=list_id,
-            user_id=target_user_id,
-            role=role,
-        )
-        self.repository.db.add(new_member)
-        self.repository.db.commit()
+        membership_cache.invalidate(list_id, target_user_id)
 
         return MemberInfo(
-            id=target_user.id,
-            name=target_user.name,
+            id=target_user_id,
+            name=target_name,
             avatar=None,
-            role=role,
+            role=new_member.role,
             created_at=new_member.created_at,
         )
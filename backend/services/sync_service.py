@@ -0,0 +1,125 @@
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pagination import decode_cursor, encode_cursor
+from repositories.sync_repository import SyncRepository
+from schemas.item import ItemResponse
+from schemas.list import ListResponse
+from schemas.sync import ChangesResponse, DeletedEntity, SyncMember
+
+# Sections of the change feed, in the order a pass reads them: lists before
+# their members and items, deletions last
+STAGES = ["lists", "members", "items", "joined_items", "deleted"]
+# Before a pass starts, the key that sorts before every row
+START = (-1, "")
+
+
+class SyncService:
+    """
+    Change feed for GET /sync/changes.
+
+    Rows record the transaction that last wrote them (change_xid). A pass
+    returns every row written by transaction since or later, stage by stage
+    and page by page. It ends with a cursor whose since is the horizon taken
+    when the pass began: the oldest transaction then still running. Anything
+    the pass missed was written by that transaction or a later one, so the
+    next pass returns it. Rows changed during a pass may come twice; clients
+    apply changes as upserts, so that is harmless.
+
+    The cursor is (since, horizon, stage, change_xid, id): where the pass
+    stopped. horizon is -1 between passes.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.repository = SyncRepository(db)
+
+    async def get_changes(
+        self, user_id: str, cursor: str | None, limit: int
+    ) -> ChangesResponse:
+        if cursor is None:
+            # First sync: everything, and nothing to delete yet
+            since, horizon, stage, after = 0, -1, 0, START
+        else:
+            try:
+                since, horizon, stage, after_xid, after_id = decode_cursor(
+                    cursor, int, int, int, int, str
+                )
+            except ValueError:
+                stage = None
+            if stage not in range(len(STAGES)):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor",
+                )
+            after = (after_xid, after_id)
+
+        if horizon == -1:
+            # Before the first read of the pass
+            horizon = await self.repository.get_horizon()
+
+        fetch = {
+            "lists": self.repository.get_lists,
+            "members": self.repository.get_members,
+            "items": self.repository.get_items,
+            "joined_items": self.repository.get_items_of_joined_lists,
+            "deleted": self.repository.get_tombstones,
+        }
+        page = {name: [] for name in STAGES}
+        remaining = limit
+        has_more = False
+        while stage < len(STAGES):
+            name = STAGES[stage]
+            # On a first sync every list counts as joined
+            if since == 0 and name in ("joined_items", "deleted"):
+                stage, after = stage + 1, START
+                continue
+            if remaining == 0:
+                has_more = True
+                break
+
+            # One extra row tells whether the stage continues on the next page
+            rows = await fetch[name](user_id, since, after, remaining + 1)
+            if len(rows) > remaining:
+                rows = rows[:remaining]
+                page[name] += rows
+                after = (rows[-1].change_xid, rows[-1].id)
+                has_more = True
+                break
+            page[name] += rows
+            remaining -= len(rows)
+            stage, after = stage + 1, START
+
+        if has_more:
+            next_cursor = encode_cursor(since, horizon, stage, *after)
+        else:
+            next_cursor = encode_cursor(horizon, -1, 0, *START)
+
+        return ChangesResponse(
+            lists=[ListResponse.model_validate(row) for row in page["lists"]],
+            members=[
+                SyncMember(
+                    id=row.user_id,
+                    name=row.name,
+                    avatar=None,
+                    role=row.role,
+                    created_at=row.created_at,
+                    list_id=row.list_id,
+                )
+                for row in page["members"]
+            ],
+            items=[
+                ItemResponse.model_validate(row)
+                for row in page["items"] + page["joined_items"]
+            ],
+            deleted=[
+                DeletedEntity(
+                    entity_type=row.entity_type,
+                    entity_id=row.entity_id,
+                    list_id=row.list_id,
+                    deleted_at=row.deleted_at,
+                )
+                for row in page["deleted"]
+            ],
+            cursor=next_cursor,
+            has_more=has_more,
+        )
@@ -0,0 +1,124 @@
+"""
+Test setup: a throwaway Postgres database for the whole test session.
+
+The database is created on the server DATABASE_URL points at, migrated to
+head with Alembic, and dropped when the session ends, so the suite never
+touches the configured database's data. DATABASE_URL is repointed before
+any test imports an app module, because database.py builds its engines at
+import time.
+
+Run with: cd backend && uv run pytest
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from config import Settings  # noqa: E402
+
+_admin_url: str | None = None
+_test_database: str | None = None
+
+
+def pytest_configure(config):
+    global _admin_url, _test_database
+    _admin_url = Settings().get_database_url
+    _test_database = f"{make_url(_admin_url).database}_test_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(_admin_url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE "{_test_database}"'))
+    admin.dispose()
+
+    # Swap only the path, keeping the query (e.g. a Unix socket host) verbatim
+    os.environ["DATABASE_URL"] = urlunsplit(
+        urlsplit(_admin_url)._replace(path=f"/{_test_database}")
+    )
+    os.environ["CLOUD_SQL_CONNECTION_NAME"] = ""
+    command.upgrade(Config(str(BACKEND / "alembic.ini")), "head")
+
+
+def pytest_unconfigure(config):
+    if _test_database is None:
+        return
+    admin = create_engine(_admin_url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{_test_database}" WITH (FORCE)'))
+    admin.dispose()
+
+
+@pytest.fixture
+def run():
+    """
+    Run a coroutine on a fresh event loop and return its result.
+
+    asyncpg connections belong to the loop that opened them, so the pool is
+    emptied before the loop closes.
+    """
+    from database import async_engine
+
+    async def run_and_release(coro):
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+
+    return lambda coro: asyncio.run(run_and_release(coro))
+
+
+@pytest.fixture
+def user_id(run) -> str:
+    """A new user's id."""
+    from database import AsyncSessionLocal
+    from models.user import User
+
+    async def create():
+        async with AsyncSessionLocal() as db:
+            name = f"test-{uuid.uuid4().hex[:8]}"
+            user = User(username=name, name=name, password_hash="x")
+            db.add(user)
+            await db.commit()
+            return user.id
+
+    return run(create())
+
+
+@pytest.fixture
+def list_id(run, user_id) -> str:
+    """A new list owned by user_id."""
+    from database import AsyncSessionLocal
+    from repositories.list_repository import ListRepository
+    from schemas.list import ListCreate
+
+    async def create():
+        async with AsyncSessionLocal() as db:
+            shopping_list = await ListRepository(db).create(ListCreate(name="Groceries"), user_id)
+            return shopping_list.id
+
+    return run(create())
+
+
+@pytest.fixture
+def item_id(run, list_id, user_id) -> str:
+    """A new unchecked item on list_id."""
+    from database import AsyncSessionLocal
+    from repositories.item_repository import ItemRepository
+    from schemas.item import ItemCreate
+
+    async def create():
+        async with AsyncSessionLocal() as db:
+            item = await ItemRepository(db).create(list_id, ItemCreate(name="Milk"), user_id)
+            return item.id
+
+    return run(create())
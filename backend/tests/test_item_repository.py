@@ -0,0 +1,71 @@
+"""
+Item writes return the row as written, even when the item is already loaded.
+
+Each test keeps a reference to the loaded item: the session's identity map
+holds objects weakly, so an unreferenced one would simply be reloaded.
+"""
+
+from database import AsyncSessionLocal
+from models.item import Item
+from repositories.item_repository import ItemRepository
+from schemas.item import ItemUpdate
+
+
+def test_update_returns_new_values_of_loaded_item(run, list_id, item_id):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            loaded = await db.get(Item, item_id)
+            version = loaded.version
+
+            updated = await ItemRepository(db).update(
+                list_id, item_id, ItemUpdate(name="Oat milk", is_checked=True)
+            )
+
+            assert updated.name == "Oat milk"
+            assert updated.is_checked is True
+            assert updated.version == version + 1
+
+    run(scenario())
+
+
+def test_toggle_checked_returns_new_state_of_loaded_item(run, list_id, item_id, user_id):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            loaded = await db.get(Item, item_id)
+            assert loaded.is_checked is False
+
+            toggled = await ItemRepository(db).toggle_checked(list_id, item_id, user_id)
+
+            assert toggled.is_checked is True
+            assert toggled.checked_by == user_id
+            assert toggled.version == 2
+
+    run(scenario())
+
+
+def test_batch_check_returns_new_state_of_loaded_item(run, list_id, item_id, user_id):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            loaded = await db.get(Item, item_id)
+
+            [checked] = await ItemRepository(db).batch_check(list_id, [item_id], True, user_id)
+
+            assert checked is loaded
+            assert checked.is_checked is True
+            assert checked.version == 2
+
+    run(scenario())
+
+
+def test_set_rank_returns_new_rank_of_loaded_item(run, list_id, item_id):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            loaded = await db.get(Item, item_id)
+
+            moved = await ItemRepository(db).set_rank(list_id, item_id, "zz")
+
+            assert moved is loaded
+            assert moved.rank == "zz"
+            assert moved.version == 2
+
+    run(scenario())
@@ -0,0 +1,22 @@
+"""List writes return the row as written, even when the list is already loaded."""
+
+from sqlalchemy import select
+
+from database import AsyncSessionLocal
+from models.shopping_list import ShoppingList
+from repositories.list_repository import ListRepository
+from schemas.list import ListUpdate
+
+
+def test_update_returns_new_values_of_loaded_list(run, list_id):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            loaded = await db.scalar(select(ShoppingList).where(ShoppingList.id == list_id))
+            version = loaded.version
+
+            updated = await ListRepository(db).update(list_id, ListUpdate(name="Hardware"))
+
+            assert updated.name == "Hardware"
+            assert updated.version == version + 1
+
+    run(scenario())
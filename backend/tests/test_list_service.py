@@ -0,0 +1,110 @@
+"""
+Query budgets for the list member operations.
+
+Each operation runs against lists shared with households of increasing size,
+counting the SQL statements it sends. A count that grows with the number of
+members is an N+1 query; one above the budget is a regression either way.
+The membership cache is cleared before every call, so the access check's
+query is always counted.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import event, insert
+
+# Most statements each operation may send, including the access check
+BUDGETS = {
+    "get_list_members": 2,
+    "update_member_role": 2,
+    "add_member": 3,
+}
+
+HOUSEHOLD_SIZES = [1, 10, 50]
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+async def measure(members: int) -> dict[str, int]:
+    """Statement counts of each operation on a list with this many members."""
+    from database import AsyncSessionLocal, async_engine
+    from membership_cache import membership_cache
+    from models.list_member import ListMember, MemberRole
+    from models.user import User
+    from repositories.list_repository import ListRepository
+    from schemas.list import ListCreate, UpdateMemberRole
+    from services.list_service import ListService
+
+    prefix = f"qc-{uuid.uuid4().hex[:8]}"
+    user_ids = [str(uuid.uuid4()) for _ in range(members + 1)]
+    owner_id, member_ids, newcomer_id = user_ids[0], user_ids[1:members], user_ids[members]
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User), [
+            {"id": user_id, "username": f"{prefix}-{i}", "name": f"Member {i}", "password_hash": "x"}
+            for i, user_id in enumerate(user_ids)
+        ])
+        await db.commit()
+        shopping_list = await ListRepository(db).create(ListCreate(name=prefix), owner_id)
+        if member_ids:
+            await db.execute(insert(ListMember), [
+                {"list_id": shopping_list.id, "user_id": user_id, "role": MemberRole.editor}
+                for user_id in member_ids
+            ])
+            await db.commit()
+    list_id = shopping_list.id
+
+    counter = StatementCounter()
+
+    async def count(operation) -> int:
+        membership_cache.clear()
+        async with AsyncSessionLocal() as db:
+            counter.count = 0
+            await operation(ListService(db))
+            return counter.count
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        return {
+            "get_list_members": await count(
+                lambda service: service.get_list_members(list_id, owner_id)
+            ),
+            "add_member": await count(
+                lambda service: service.add_member(list_id, newcomer_id, "editor", owner_id)
+            ),
+            "update_member_role": await count(
+                lambda service: service.update_member_role(
+                    list_id, newcomer_id, UpdateMemberRole(role="viewer"), owner_id
+                )
+            ),
+        }
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+
+
+@pytest.fixture(scope="module")
+def counts() -> dict[int, dict[str, int]]:
+    """Statement counts per household size, measured once for the module."""
+    from database import async_engine
+
+    async def measure_all():
+        try:
+            return {size: await measure(size) for size in HOUSEHOLD_SIZES}
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(measure_all())
+
+
+@pytest.mark.parametrize("operation", BUDGETS)
+def test_member_operation_stays_within_budget(counts, operation):
+    by_size = {size: counts[size][operation] for size in HOUSEHOLD_SIZES}
+    assert len(set(by_size.values())) == 1, f"{operation} grows with the household: {by_size}"
+    assert by_size[HOUSEHOLD_SIZES[0]] <= BUDGETS[operation]
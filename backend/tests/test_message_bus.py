@@ -0,0 +1,38 @@
+"""The Postgres message bus connects with any URL the app's engines accept."""
+
+import asyncio
+import os
+
+from config import Settings
+from message_bus import create_message_bus
+
+
+def test_postgres_bus_connects_with_a_sqlalchemy_driver_url(run):
+    settings = Settings(
+        database_url=os.environ["DATABASE_URL"].replace("postgresql://", "postgresql+psycopg2://", 1),
+        message_bus_backend="postgres",
+    )
+    received = asyncio.Queue()
+
+    async def handler(list_id, message):
+        await received.put((list_id, message))
+
+    async def ignore(list_id, message):
+        pass
+
+    async def scenario():
+        # A node never receives its own messages, so one sends, one listens
+        sender, listener = create_message_bus(settings), create_message_bus(settings)
+        await sender.start(ignore)
+        await listener.start(handler)
+        try:
+            await listener.subscribe("bus-list")
+            await sender.publish("bus-list", {"type": "ping"})
+            return await asyncio.wait_for(received.get(), timeout=5)
+        finally:
+            await sender.stop()
+            await listener.stop()
+
+    list_id, message = run(scenario())
+    assert list_id == "bus-list"
+    assert message["type"] == "ping"
@@ -0,0 +1,218 @@
+"""
+EXPLAIN-based regression tests for the hot query shapes.
+
+Seeds a synthetic data set into the test database and vacuums it so
+index-only scans are costed as they would be on a settled table. Each test
+then calls a repository method behind a hot path, captures the SQL it
+actually sends, runs EXPLAIN on that statement with the planner's default
+settings, and fails if it stops using the index built for it:
+
+- a list's items in display order: a keyset page at a time, the
+  (list_id, is_checked, sort_index, id) index read in order with no sort
+  step; the whole list, any index on list_id (fetching every item and
+  sorting them is the planner's cheapest choice, and a fine one)
+- the access check (ListRepository.get_member_role): the list's primary key
+  and an index-only scan of the unique (list_id, user_id) index
+- a user's lists, and a page of their list overview: an index-only scan of
+  (user_id, list_id) on list_members, with no sequential scans
+- the change feed: items and tombstones changed since a transaction, by
+  their (list_id, change_xid) indexes
+"""
+
+import json
+
+import pytest
+from sqlalchemy import event, text
+
+from database import AsyncSessionLocal, async_engine, engine
+from repositories.item_repository import ItemRepository
+from repositories.list_repository import ListRepository
+from repositories.sync_repository import SyncRepository
+
+SEED_PARAMS = {
+    "users": 2000,
+    "lists": 5000,
+    "items_per_list": 20,
+    "long_list_items": 2000,
+}
+
+SEED_SQL = [
+    """
+    INSERT INTO users (id, username, name, password_hash, is_active, is_admin, created_at, updated_at)
+    SELECT 'plan-user-' || n, 'plan-user-' || n, 'Plan User ' || n, 'x', true, false, now(), now()
+    FROM generate_series(1, :users) AS n
+    """,
+    """
+    INSERT INTO shopping_lists (id, owner_id, name, color, icon, is_archived, sort_mode, created_at, updated_at)
+    SELECT 'plan-list-' || n, 'plan-user-' || (n % :users + 1), 'List ' || n, '#4CAF50',
+           'shopping_cart', n % 10 = 0, 'custom', now(), now() - n * interval '1 minute'
+    FROM generate_series(1, :lists) AS n
+    """,
+    """
+    INSERT INTO list_members (id, list_id, user_id, role, created_at)
+    SELECT gen_random_uuid()::text, 'plan-list-' || n,
+           'plan-user-' || ((n + k * 7) % :users + 1),
+           CASE WHEN k = 0 THEN 'owner'::memberrole ELSE 'editor'::memberrole END, now()
+    FROM generate_series(1, :lists) AS n, generate_series(0, 2) AS k
+    """,
+    """
+    INSERT INTO items (id, list_id, name, quantity, is_checked, sort_index, rank, version, created_by, created_at, updated_at)
+    SELECT gen_random_uuid()::text, 'plan-list-' || n, 'Item ' || i, 1, i % 3 = 0, i,
+           lpad((2 * i - 1)::text, 10, '0'), 1,
+           'plan-user-' || (n % :users + 1), now(), now()
+    FROM generate_series(1, :lists) AS n, generate_series(1, :items_per_list) AS i
+    """,
+    # One long list, where reading a page in index order clearly beats
+    # fetching and sorting every item
+    """
+    INSERT INTO items (id, list_id, name, quantity, is_checked, sort_index, rank, version, created_by, created_at, updated_at)
+    SELECT gen_random_uuid()::text, 'plan-list-42', 'Long list item ' || i, 1, i % 3 = 0,
+           :items_per_list + i, lpad((2 * (:items_per_list + i) - 1)::text, 10, '0'), 1,
+           'plan-user-43', now(), now()
+    FROM generate_series(1, :long_list_items) AS i
+    """,
+    """
+    INSERT INTO tombstones (id, entity_type, entity_id, list_id, user_id, deleted_at)
+    SELECT gen_random_uuid()::text, 'item', gen_random_uuid()::text, 'plan-list-' || n, NULL, now()
+    FROM generate_series(1, :lists) AS n, generate_series(1, 5) AS i
+    """,
+]
+
+TABLES = "users, shopping_lists, list_members, items, tombstones"
+
+# (name, repository call, expectation) for each hot query. Each call takes
+# an AsyncSession and the change feed's since, and sends exactly one
+# statement.
+CHECKS = [
+    (
+        "items for list",
+        lambda db, since: ItemRepository(db).get_all_for_list("plan-list-42"),
+        {"no_seq_scan": True},
+    ),
+    (
+        "page of items for list",
+        lambda db, since: ItemRepository(db).get_all_for_list(
+            "plan-list-42",
+            limit=11,
+            after=(False, 5, ""),
+            columns=["id", "name", "is_checked", "sort_index"],
+        ),
+        {"index": "ix_items_list_id_is_checked_sort_index_id", "no_sort": True},
+    ),
+    (
+        "access check",
+        lambda db, since: ListRepository(db).get_member_role("plan-list-42", "plan-user-43"),
+        {
+            "index": "shopping_lists_pkey",
+            "index_only": ("uq_list_members_list_id_user_id",),
+            "no_seq_scan": True,
+        },
+    ),
+    (
+        "lists for user",
+        lambda db, since: ListRepository(db).get_all_for_user("plan-user-7"),
+        {"index_only": ("ix_list_members_user_id_list_id",), "no_seq_scan": True},
+    ),
+    (
+        "list overview page",
+        lambda db, since: ListRepository(db).get_overview_for_user("plan-user-7", limit=51),
+        {"index_only": ("ix_list_members_user_id_list_id",), "no_seq_scan": True},
+    ),
+    (
+        "items changed since",
+        lambda db, since: SyncRepository(db).get_items("plan-user-7", since, (-1, ""), 501),
+        {"index": "ix_items_list_id_change_xid", "no_seq_scan": True},
+    ),
+    (
+        "tombstones since",
+        lambda db, since: SyncRepository(db).get_tombstones("plan-user-7", since, (-1, ""), 501),
+        {"index": "ix_tombstones_list_id_change_xid", "no_seq_scan": True},
+    ),
+]
+
+
+def plan_nodes(node: dict):
+    """Yield every node of an EXPLAIN (FORMAT JSON) plan tree."""
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def shortfalls(plan: dict, expectation: dict) -> list[str]:
+    """Return the ways a plan falls short of an expectation."""
+    nodes = list(plan_nodes(plan))
+    problems = []
+
+    if "index" in expectation and not any(
+        node.get("Index Name") == expectation["index"] for node in nodes
+    ):
+        problems.append(f"does not use index {expectation['index']}")
+
+    if "index_only" in expectation and not any(
+        node["Node Type"] == "Index Only Scan"
+        and node.get("Index Name") in expectation["index_only"]
+        for node in nodes
+    ):
+        problems.append(f"no index-only scan of {' or '.join(expectation['index_only'])}")
+
+    if expectation.get("no_sort") and any(
+        node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes
+    ):
+        problems.append("sorts instead of reading the index in order")
+
+    if expectation.get("no_seq_scan"):
+        for node in nodes:
+            if node["Node Type"] == "Seq Scan":
+                problems.append(f"sequential scan on {node.get('Relation Name')}")
+
+    return problems
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded():
+    """Seed the synthetic data set once for the module."""
+    with engine.begin() as conn:
+        for statement in SEED_SQL:
+            conn.execute(text(statement), SEED_PARAMS)
+    # VACUUM cannot run inside a transaction block. Without INDEX_CLEANUP ON
+    # it skips index cleanup when other tests have left only a few dead
+    # rows, and pages holding them stay not all-visible
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"VACUUM (ANALYZE, INDEX_CLEANUP ON) {TABLES}"))
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "call, expectation", [check[1:] for check in CHECKS], ids=[check[0] for check in CHECKS]
+)
+def test_hot_query_uses_its_index(run, call, expectation):
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append((statement, parameters))
+
+    async def explain():
+        async with AsyncSessionLocal() as db:
+            # Everything seeded is older than this, as for a client polling
+            # a feed it is up to date with
+            since = await SyncRepository(db).get_horizon()
+
+            event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+            try:
+                await call(db, since)
+            finally:
+                event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+            assert len(sent) == 1, f"sent {len(sent)} statements, expected 1"
+            statement, parameters = sent[0]
+
+            conn = await db.connection()
+            plan_json = (
+                await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            ).scalar()
+            await db.rollback()
+        plan = (json.loads(plan_json) if isinstance(plan_json, str) else plan_json)[0]["Plan"]
+        return statement, plan
+
+    statement, plan = run(explain())
+    problems = shortfalls(plan, expectation)
+    assert not problems, "\n".join([*problems, statement, json.dumps(plan, indent=2)])
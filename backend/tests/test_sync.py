@@ -0,0 +1,99 @@
+"""
+Batch sync writes items it has already loaded for its conflict check; the
+list's counters and the broadcast must still reflect what was written. The
+change feed must never tell a client to drop a membership that is live.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from api.v1.endpoints.sync import batch_sync
+from database import AsyncSessionLocal
+from models.shopping_list import ShoppingList
+from models.user import User
+from repositories.list_repository import ListRepository
+from schemas.sync import BatchSyncRequest, SyncAction
+from services import item_service
+from services.sync_service import SyncService
+
+
+def update_item_action(list_id: str, item_id: str, **payload) -> SyncAction:
+    return SyncAction(
+        id=str(uuid.uuid4()),
+        type="update_item",
+        entity_type="item",
+        entity_id=item_id,
+        payload={"list_id": list_id, "name": "Milk", "quantity": 1, **payload},
+        # Newer than the item, so the update is applied rather than a conflict
+        client_timestamp=datetime.utcnow() + timedelta(minutes=1),
+    )
+
+
+def test_checking_item_through_sync_counts_and_broadcasts_it(
+    run, monkeypatch, list_id, item_id, user_id
+):
+    broadcasts = []
+
+    async def capture(list_id, message):
+        broadcasts.append(message)
+
+    monkeypatch.setattr(item_service.manager, "broadcast", capture)
+
+    async def sync(**payload):
+        async with AsyncSessionLocal() as db:
+            response = await batch_sync(
+                BatchSyncRequest(actions=[update_item_action(list_id, item_id, **payload)]),
+                db=db,
+                current_user_id=user_id,
+            )
+        # Let the scheduled broadcast run
+        await asyncio.sleep(0)
+        assert response.synced_count == 1, response.results
+
+    async def checked_count() -> int:
+        async with AsyncSessionLocal() as db:
+            return (await db.get(ShoppingList, list_id)).checked_count
+
+    async def scenario():
+        await sync(is_checked=True)
+        assert await checked_count() == 1
+        assert broadcasts[-1]["item"]["is_checked"] is True
+
+        # Syncing the same state again changes nothing
+        await sync(is_checked=True)
+        assert await checked_count() == 1
+
+        await sync(is_checked=False)
+        assert await checked_count() == 0
+        assert broadcasts[-1]["item"]["is_checked"] is False
+
+    run(scenario())
+
+
+def test_member_removed_and_added_again_is_not_deleted_by_changes(run, list_id):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            name = f"test-{uuid.uuid4().hex[:8]}"
+            member = User(username=name, name=name, password_hash="x")
+            db.add(member)
+            await db.commit()
+            member_id = member.id
+
+            repository = ListRepository(db)
+            await repository.add_member(list_id, member_id, "editor")
+            cursor = (await SyncService(db).get_changes(member_id, None, 500)).cursor
+
+            await repository.remove_member(list_id, member_id)
+            await repository.add_member(list_id, member_id, "editor")
+
+            changes = await SyncService(db).get_changes(member_id, cursor, 500)
+
+            assert (list_id, member_id) in {
+                (member.list_id, member.id) for member in changes.members
+            }
+            assert not [
+                deleted for deleted in changes.deleted if deleted.entity_type == "member"
+            ]
+
+    run(scenario())
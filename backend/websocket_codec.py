@@ -0,0 +1,213 @@
+"""
+Wire encodings for WebSocket frames, negotiated per connection.
+
+encoding=json (default)
+    Each message is a JSON text frame.
+
+encoding=msgpack
+    Each message is a binary MessagePack frame. Keys are replaced by the
+    short aliases in KEY_ALIASES, UUID strings are sent as 16-byte binaries
+    and ISO timestamps as MessagePack timestamp extensions (type -1), which
+    roughly halves the size of an item frame. Message type values (e.g.
+    "item_added") are sent unchanged.
+
+compression=deflate
+    Every frame is binary and starts with a one-byte header: 0 means the
+    rest is the plain payload, 1 means it is a raw DEFLATE stream (zlib
+    wbits=-15) of the payload. Only payloads of at least
+    ws_compression_threshold_bytes are compressed, since small frames would
+    grow. The payload is UTF-8 JSON or MessagePack depending on the encoding.
+
+deltas=true
+    item_updated/items_updated events are sent as item_patched/items_patched,
+    whose items carry only the id, the new version and the fields that
+    changed. Every change increments an item's version by one, so a client
+    applies a patch when it holds version - 1, ignores it when it already
+    holds that version or newer, and otherwise asks for an items_snapshot.
+
+Compression is done once per frame and shared by every subscriber that
+negotiated it, unlike protocol-level permessage-deflate which compresses
+every frame separately for every socket.
+"""
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, Union
+
+import msgpack
+import orjson
+
+from config import get_settings
+
+settings = get_settings()
+
+ENCODINGS = ("json", "msgpack")
+COMPRESSIONS = ("deflate",)
+
+FRAME_PLAIN = 0
+FRAME_DEFLATE = 1
+
+# Long key -> short key used by the msgpack encoding (aliases are unique so
+# clients can invert the table)
+KEY_ALIASES: Dict[str, str] = {
+    # Envelope
+    "type": "t",
+    "list_id": "l",
+    "seq": "s",
+    "epoch": "e",
+    "user_id": "u",
+    "user_name": "un",
+    "timestamp": "ts",
+    "detail": "d",
+    "item": "i",
+    "items": "is",
+    "item_id": "ii",
+    "item_ids": "iis",
+    # Item fields
+    "id": "id",
+    "name": "n",
+    "quantity": "q",
+    "unit": "ut",
+    "note": "nt",
+    "is_checked": "c",
+    "checked_at": "ca",
+    "checked_by": "cb",
+    "sort_index": "si",
+    "rank": "rk",
+    "version": "v",
+    "created_by": "by",
+    "created_at": "at",
+    "updated_at": "ua",
+}
+
+# Fields holding UUID strings or ISO timestamps, sent in binary form
+UUID_FIELDS = {"id", "list_id", "user_id", "item_id", "checked_by", "created_by"}
+TIMESTAMP_FIELDS = {"timestamp", "checked_at", "created_at", "updated_at"}
+
+
+def _compact_uuid(value):
+    if isinstance(value, str):
+        try:
+            return uuid.UUID(value).bytes
+        except ValueError:
+            return value
+    return value
+
+
+def _compact_timestamp(value):
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        # The API's naive timestamps are UTC
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(value)
+    return value
+
+
+def compact(value):
+    """Rewrite a message for the msgpack encoding (short keys, binary UUIDs and timestamps)."""
+    if isinstance(value, dict):
+        compacted = {}
+        for key, field in value.items():
+            if key in UUID_FIELDS:
+                field = _compact_uuid(field)
+            elif key in TIMESTAMP_FIELDS:
+                field = _compact_timestamp(field)
+            else:
+                field = compact(field)
+            compacted[KEY_ALIASES.get(key, key)] = field
+        return compacted
+    if isinstance(value, list):
+        return [compact(field) for field in value]
+    return value
+
+
+# Update events and the field-delta events they are sent as under deltas=true
+PATCHED_EVENTS = {"item_updated": "item_patched", "items_updated": "items_patched"}
+
+
+def _patch(item: dict, changed: List[str] | None) -> dict:
+    if changed is None:
+        return item
+    patch = {"id": item["id"], "version": item["version"]}
+    for field in changed:
+        patch[field] = item[field]
+    return patch
+
+
+def wire_message(message: dict, deltas: bool) -> dict:
+    """
+    The message as sent to a connection.
+
+    Update events carry full items plus the names of the fields that changed
+    ("changed", one list per item for batches). Connections that negotiated
+    deltas receive just those fields; the others receive the full items.
+    """
+    if "changed" not in message:
+        return message
+    wire = {key: value for key, value in message.items() if key != "changed"}
+    if not deltas:
+        return wire
+
+    changed = message["changed"]
+    if "items" in message:
+        wire["items"] = [
+            _patch(item, fields) for item, fields in zip(message["items"], changed)
+        ]
+    else:
+        wire["item"] = _patch(message["item"], changed)
+    wire["type"] = PATCHED_EVENTS[message["type"]]
+    return wire
+
+
+def encode_message(message: dict) -> str:
+    """Encode a message as a JSON text frame."""
+    return orjson.dumps(message).decode("utf-8")
+
+
+def encode_frame(message: dict, encoding: str, compress: bool) -> Union[str, bytes]:
+    """Encode a message for a connection's negotiated encoding and compression."""
+    if encoding == "msgpack":
+        payload = msgpack.packb(compact(message), default=str)
+    elif compress:
+        payload = orjson.dumps(message)
+    else:
+        return encode_message(message)
+
+    if not compress:
+        return payload
+    if len(payload) < settings.ws_compression_threshold_bytes:
+        return bytes((FRAME_PLAIN,)) + payload
+    compressor = zlib.compressobj(settings.ws_compression_level, zlib.DEFLATED, -15)
+    return bytes((FRAME_DEFLATE,)) + compressor.compress(payload) + compressor.flush()
+
+
+class Frame:
+    """
+    A message to send, encoded lazily and at most once per wire format.
+
+    The same Frame is queued on every subscriber's connection; the first
+    writer that needs a given wire format (encoding, compression, deltas)
+    produces it and the rest reuse it.
+    """
+
+    __slots__ = ("message", "_encoded")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self._encoded: Dict[tuple[str, bool, bool], Union[str, bytes]] = {}
+
+    def encode(
+        self, encoding: str = "json", compress: bool = False, deltas: bool = False
+    ) -> Union[str, bytes]:
+        key = (encoding, compress, deltas)
+        data = self._encoded.get(key)
+        if data is None:
+            data = self._encoded[key] = encode_frame(
+                wire_message(self.message, deltas), encoding, compress
+            )
+        return data
@@ -1,93 +1,715 @@
 """WebSocket connection manager for real-time list sync."""
-from collections import defaultdict
+import asyncio
+import time
+import uuid
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set
 
-from fastapi import WebSocket
+from fastapi import WebSocket, WebSocketDisconnect, status
+
+from config import get_settings
+from message_bus import MessageBus, InMemoryMessageBus, create_message_bus
+from websocket_codec import Frame
+
+settings = get_settings()
+
+
+# Single-item events that may be merged into one batch frame per list,
+# mapped to the batch event they merge into
+COALESCED_EVENTS = {
+    "item_added": "items_added",
+    "items_added": "items_added",
+    "item_updated": "items_updated",
+    "items_updated": "items_updated",
+}
+
+
+# Presence and typing events are only meaningful live; they are neither
+# sequenced nor kept for replay
+EPHEMERAL_EVENTS = {"user_joined", "user_left", "user_typing", "user_stopped_typing"}
+
+# Events about a user that none of that user's own connections receive (on
+# any instance), so a second tab or device does not see its own indicator
+SELF_EXCLUDED_EVENTS = {"user_typing", "user_stopped_typing"}
+
+
+def coalesce_item_events(messages: List[dict]) -> List[dict]:
+    """
+    Merge consecutive item events of the same kind from the same user.
+
+    A run of item_added/items_added events becomes a single items_added frame
+    carrying every item (likewise for updates). Runs of one are left as-is.
+    """
+    runs: List[List[dict]] = []
+    for message in messages:
+        key = (COALESCED_EVENTS[message["type"]], message.get("user_id"))
+        if runs and (COALESCED_EVENTS[runs[-1][0]["type"]], runs[-1][0].get("user_id")) == key:
+            runs[-1].append(message)
+        else:
+            runs.append([message])
+
+    merged = []
+    for run in runs:
+        if len(run) == 1:
+            merged.append(run[0])
+            continue
+        items = []
+        # Changed fields per item (None: unknown, treat the whole item as changed)
+        changed = []
+        for message in run:
+            if "items" in message:
+                items.extend(message["items"])
+                changed.extend(message.get("changed") or [None] * len(message["items"]))
+            else:
+                items.append(message["item"])
+                changed.append(message.get("changed"))
+        batch = {
+            "type": COALESCED_EVENTS[run[0]["type"]],
+            "items": items,
+            "user_id": run[0].get("user_id"),
+        }
+        if any(fields is not None for fields in changed):
+            batch["changed"] = changed
+        merged.append(batch)
+    return merged
+
+
+class ListHistory:
+    """
+    Sequence counter and bounded replay buffer for one list on this instance.
+
+    Sequence numbers are assigned by the instance that delivers the event, so
+    they are only comparable within one epoch. A client that reconnects with
+    another epoch (different instance, restart, or expired history) must
+    resync.
+    """
+
+    __slots__ = ("epoch", "seq", "events")
+
+    def __init__(self, size: int):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        # (seq, frame) pairs, oldest first
+        self.events: deque = deque(maxlen=size)
+
+    def record(self, message: dict) -> Frame:
+        """Stamp the next sequence number on a message and keep its frame."""
+        self.seq += 1
+        frame = Frame({**message, "seq": self.seq})
+        self.events.append((self.seq, frame))
+        return frame
+
+    def since(self, last_seq: int) -> Optional[List[Frame]]:
+        """Frames after last_seq, or None if some of them are no longer buffered."""
+        if last_seq > self.seq:
+            return None
+        oldest = self.events[0][0] if self.events else self.seq + 1
+        if last_seq < oldest - 1:
+            return None
+        return [frame for seq, frame in self.events if seq > last_seq]
+
+
+class TypingState:
+    """Throttle and expiry timers for one user typing on one list."""
+
+    __slots__ = ("connection", "last_emit", "trailing", "expiry")
+
+    def __init__(self, connection: "Connection"):
+        self.connection = connection
+        self.last_emit = 0.0
+        self.trailing: Optional[asyncio.TimerHandle] = None
+        self.expiry: Optional[asyncio.TimerHandle] = None
+
+    def cancel(self):
+        if self.trailing is not None:
+            self.trailing.cancel()
+        if self.expiry is not None:
+            self.expiry.cancel()
+
+
+class Connection:
+    """
+    A WebSocket with its own bounded outbound queue and writer task.
+
+    A connection may be subscribed to any number of lists. Broadcasting only
+    enqueues, so a slow socket delays nothing but itself. Clients whose
+    backlog stays above the high-water mark for too long, fill the queue, or
+    make no progress on a send for the send timeout are dropped.
+
+    Frames are encoded by the writer task in the connection's negotiated
+    encoding (see websocket_codec); each encoding of a frame is produced
+    once and shared by every connection that uses it.
+
+    The writer drains everything queued each time it wakes. The send timeout
+    is enforced by a watchdog re-armed once per timeout period rather than a
+    timer per frame.
+    """
+
+    __slots__ = (
+        "websocket",
+        "user_id",
+        "user_name",
+        "encoding",
+        "compress",
+        "deltas",
+        "heartbeat",
+        "connected_at",
+        "last_seen",
+        "lists",
+        "queue",
+        "over_high_water_since",
+        "closed",
+        "_on_drop",
+        "_writer",
+        "_wakeup",
+        "_sent",
+        "_watchdog",
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        user_name: str,
+        on_drop: Callable[["Connection", str], None],
+        encoding: str = "json",
+        compress: bool = False,
+        deltas: bool = False,
+        heartbeat: bool = False,
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.user_name = user_name
+        self.encoding = encoding
+        self.compress = compress
+        # Receive item updates as item_patched/items_patched field deltas
+        self.deltas = deltas
+        # Answers app-level pings, and is reaped when it stops answering
+        self.heartbeat = heartbeat
+        self.connected_at = datetime.utcnow().isoformat()
+        # Monotonic time of the last frame received from the client
+        self.last_seen = time.monotonic()
+        # Lists this connection is subscribed to
+        self.lists: Set[str] = set()
+        # Frames waiting for the writer, oldest first
+        self.queue: deque = deque()
+        self.over_high_water_since: Optional[float] = None
+        self.closed = False
+        self._on_drop = on_drop
+        # Resolved by enqueue while the writer waits for frames
+        self._wakeup: Optional[asyncio.Future] = None
+        # Frames sent so far, for the send watchdog
+        self._sent = 0
+        self._watchdog: Optional[asyncio.TimerHandle] = None
+        self._writer = asyncio.get_running_loop().create_task(self._write_loop())
+
+    def enqueue(self, frame: Frame) -> None:
+        """Queue a frame for delivery, dropping the client if it has fallen too far behind."""
+        if self.closed:
+            return
+
+        if len(self.queue) >= settings.ws_send_queue_size:
+            self._on_drop(self, "send queue full")
+            return
+        self.queue.append(frame)
+        wakeup = self._wakeup
+        if wakeup is not None:
+            self._wakeup = None
+            wakeup.set_result(None)
+
+        if len(self.queue) < settings.ws_send_high_water:
+            self.over_high_water_since = None
+        elif self.over_high_water_since is None:
+            self.over_high_water_since = time.monotonic()
+        elif time.monotonic() - self.over_high_water_since > settings.ws_slow_client_timeout_seconds:
+            self._on_drop(self, "send backlog above high-water mark")
+
+    def send(self, message: dict) -> None:
+        """Queue a message for this connection only."""
+        self.enqueue(Frame(message))
+
+    def touch(self) -> None:
+        """Record that the client is alive (it sent us a frame)."""
+        self.last_seen = time.monotonic()
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        queue = self.queue
+        while True:
+            if not queue:
+                self._wakeup = loop.create_future()
+                await self._wakeup
+            if self._watchdog is None:
+                self._watchdog = loop.call_later(
+                    settings.ws_send_timeout_seconds, self._check_progress, self._sent
+                )
+            try:
+                while queue:
+                    data = queue.popleft().encode(self.encoding, self.compress, self.deltas)
+                    if isinstance(data, str):
+                        await self.websocket.send_text(data)
+                    else:
+                        await self.websocket.send_bytes(data)
+                    self._sent += 1
+            except WebSocketDisconnect:
+                # The client went away; the endpoint's receive loop cleans up
+                self.closed = True
+                return
+            except Exception as e:
+                self._on_drop(self, f"send failed: {e}")
+                return
+
+    def _check_progress(self, sent: int):
+        """Drop the client if a send has made no progress for a whole send timeout."""
+        self._watchdog = None
+        if self.closed or self._wakeup is not None:
+            # Closed, or idle: the next frame re-arms the watchdog
+            return
+        if self._sent == sent:
+            self._on_drop(self, "send timed out")
+            return
+        self._watchdog = asyncio.get_running_loop().call_later(
+            settings.ws_send_timeout_seconds, self._check_progress, self._sent
+        )
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE):
+        """Stop the writer task and close the socket."""
+        self.closed = True
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
 
 
 class ConnectionManager:
     """Manages WebSocket connections for real-time list synchronization."""
 
-    def __init__(self):
-        # Dict mapping list_id to list of WebSocket connections
-        self.active_connections: Dict[str, List[WebSocket]] = defaultdict(list)
-        # Dict mapping list_id to dict of user_id -> user data
-        self.active_users: Dict[str, Dict[str, dict]] = defaultdict(dict)
+    def __init__(self, bus: Optional[MessageBus] = None):
+        # Relays broadcasts to connections held by other server instances
+        self.bus = bus or InMemoryMessageBus()
+        # Two-way registry; a key exists only while it has connections, so
+        # memory stays bounded however many lists and users come and go.
+        # WebSocket -> Connection (each Connection knows its lists)
+        self.connections: Dict[WebSocket, Connection] = {}
+        # list_id -> connections subscribed to it
+        self.channels: Dict[str, Set[Connection]] = {}
+        # user_id -> that user's connections
+        self.user_connections: Dict[str, Set[Connection]] = {}
+        # Item events waiting out the coalescing window, per list
+        self._pending: Dict[str, List[dict]] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        # Sequence counters and replay buffers for lists with local subscribers
+        # (kept for a while after the last one leaves so reconnects can replay)
+        self._history: Dict[str, ListHistory] = {}
+        self._history_expiry: Dict[str, asyncio.TimerHandle] = {}
+        # Typing indicator throttles, keyed by (list_id, user_id)
+        self._typing: Dict[tuple[str, str], TypingState] = {}
+        # Heartbeat task and counters for connections removed by the server
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.reaped_connections = 0
+        self.dropped_connections = 0
 
-    async def connect(self, websocket: WebSocket, list_id: str, user_id: str, user_name: str):
-        """Accept a WebSocket connection and announce user presence."""
-        await websocket.accept()
-        self.active_connections[list_id].append(websocket)
-        self.active_users[list_id][user_id] = {
-            "user_id": user_id,
-            "user_name": user_name,
-            "connected_at": datetime.utcnow().isoformat(),
+    async def start(self):
+        """Start receiving broadcasts from other instances and the heartbeat reaper."""
+        await self.bus.start(self._on_bus_message)
+        if settings.ws_heartbeat_interval_seconds > 0:
+            self._heartbeat_task = asyncio.get_running_loop().create_task(
+                self._heartbeat_loop()
+            )
+
+    async def stop(self):
+        """Send any held item events and stop background work."""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        for list_id in list(self._pending):
+            await self._flush(list_id)
+        await self.bus.stop()
+
+    async def _heartbeat_loop(self):
+        """
+        Ping heartbeat connections and reap the ones that stopped answering.
+
+        Only connections that negotiated heartbeat=true take part. They answer
+        a ping frame with a pong (any frame counts); one that has sent nothing
+        for the heartbeat timeout is treated as half-open and disconnected, so
+        dead sockets do not linger in the fan-out until a send to them happens
+        to fail. Other connections are kept alive (or closed) by the server's
+        protocol-level WebSocket pings, which the app does not see.
+        """
+        while True:
+            await asyncio.sleep(settings.ws_heartbeat_interval_seconds)
+            deadline = time.monotonic() - settings.ws_heartbeat_timeout_seconds
+            for connection in list(self.connections.values()):
+                if not connection.heartbeat:
+                    continue
+                if connection.last_seen < deadline:
+                    self.reaped_connections += 1
+                    print(f"[WS] Reaping idle connection for user {connection.user_id}")
+                    await self.disconnect(
+                        connection.websocket, code=status.WS_1001_GOING_AWAY
+                    )
+                else:
+                    connection.send({"type": "ping"})
+
+    def stats(self) -> dict:
+        """Connection counts for metrics."""
+        return {
+            "connections": len(self.connections),
+            "lists": len(self.channels),
+            "users": len(self.user_connections),
+            "reaped_connections": self.reaped_connections,
+            "dropped_connections": self.dropped_connections,
         }
 
+    async def register(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        user_name: str,
+        encoding: str = "json",
+        compress: bool = False,
+        deltas: bool = False,
+        heartbeat: bool = False,
+    ) -> Connection:
+        """Accept a WebSocket connection that is not yet subscribed to any list."""
+        await websocket.accept()
+        connection = Connection(
+            websocket, user_id, user_name, self._drop, encoding, compress, deltas, heartbeat
+        )
+        self.connections[websocket] = connection
+        self.user_connections.setdefault(user_id, set()).add(connection)
+        return connection
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        list_id: str,
+        user_id: str,
+        user_name: str,
+        last_seq: Optional[int] = None,
+        epoch: Optional[str] = None,
+        encoding: str = "json",
+        compress: bool = False,
+        deltas: bool = False,
+        heartbeat: bool = False,
+    ) -> Connection:
+        """Accept a WebSocket connection and subscribe it to a single list."""
+        connection = await self.register(
+            websocket, user_id, user_name, encoding, compress, deltas, heartbeat
+        )
+        await self.subscribe(connection, list_id, last_seq, epoch)
+        return connection
+
+    async def subscribe(
+        self,
+        connection: Connection,
+        list_id: str,
+        last_seq: Optional[int] = None,
+        epoch: Optional[str] = None,
+    ):
+        """
+        Subscribe a connection to a list and announce user presence.
+
+        The client first receives a connected frame with the list's current
+        epoch and sequence number. A reconnecting client that passes the
+        last_seq (and epoch) it saw then receives the events it missed, or a
+        resync_required frame if they are no longer buffered.
+        """
+        if connection.closed or list_id in connection.lists:
+            return
+
+        expiry = self._history_expiry.pop(list_id, None)
+        if expiry is not None:
+            expiry.cancel()
+        history = self._history.get(list_id)
+        if history is None:
+            history = self._history[list_id] = ListHistory(settings.ws_replay_buffer_size)
+            await self.bus.subscribe(list_id)
+
+        # Presence is announced only for the user's first connection on the list
+        already_present = self._is_present(connection.user_id, list_id)
+        connection.lists.add(list_id)
+        self.channels.setdefault(list_id, set()).add(connection)
+
+        # No awaits between subscribing and queueing the replay, so no live
+        # event can slip in ahead of (or between) the replayed ones
+        connection.send({
+            "type": "connected",
+            "list_id": list_id,
+            "epoch": history.epoch,
+            "seq": history.seq,
+        })
+        if last_seq is not None:
+            missed = history.since(last_seq) if epoch == history.epoch else None
+            if missed is None:
+                connection.send({"type": "resync_required", "list_id": list_id})
+            else:
+                for frame in missed:
+                    connection.enqueue(frame)
+
+        if already_present:
+            return
+
         # Announce user joined to all other connections
         await self.broadcast(
             list_id,
             {
                 "type": "user_joined",
-                "user_id": user_id,
-                "user_name": user_name,
+                "user_id": connection.user_id,
+                "user_name": connection.user_name,
                 "timestamp": datetime.utcnow().isoformat(),
             },
-            exclude=websocket,
+            exclude=connection.websocket,
         )
 
-    async def disconnect(self, websocket: WebSocket, list_id: str, user_id: str):
-        """Remove a WebSocket connection and announce user left."""
-        if websocket in self.active_connections[list_id]:
-            self.active_connections[list_id].remove(websocket)
+    async def unsubscribe(self, connection: Connection, list_id: str):
+        """Unsubscribe a connection from a list and announce user left."""
+        if list_id not in connection.lists:
+            return
+        connection.lists.discard(list_id)
+        channel = self.channels.get(list_id)
+        if channel is not None:
+            channel.discard(connection)
+            if not channel:
+                del self.channels[list_id]
 
-        if user_id in self.active_users[list_id]:
-            del self.active_users[list_id][user_id]
+        typing = self._typing.get((list_id, connection.user_id))
+        if typing is not None and typing.connection is connection:
+            typing.cancel()
+            del self._typing[(list_id, connection.user_id)]
+
+        if list_id not in self.channels:
+            # Keep the replay buffer (and the bus subscription feeding it)
+            # for a while so a client that reconnects can catch up
+            self._history_expiry[list_id] = asyncio.get_running_loop().call_later(
+                settings.ws_replay_retention_seconds, self._schedule_expire, list_id
+            )
+
+        # The user may still be present through another connection
+        if self._is_present(connection.user_id, list_id):
+            return
 
         # Announce user left to all remaining connections
         await self.broadcast(
             list_id,
             {
                 "type": "user_left",
-                "user_id": user_id,
+                "user_id": connection.user_id,
                 "timestamp": datetime.utcnow().isoformat(),
             },
         )
 
+    async def disconnect(
+        self, websocket: WebSocket, code: int = status.WS_1000_NORMAL_CLOSURE
+    ):
+        """Close a WebSocket connection and unsubscribe it from all of its lists."""
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            # Already removed (e.g. dropped as a slow client)
+            return
+
+        user_connections = self.user_connections.get(connection.user_id)
+        if user_connections is not None:
+            user_connections.discard(connection)
+            if not user_connections:
+                del self.user_connections[connection.user_id]
+
+        await connection.close(code)
+        for list_id in list(connection.lists):
+            await self.unsubscribe(connection, list_id)
+
+    def typing(self, connection: Connection, list_id: str):
+        """
+        Record that a user is typing on a list.
+
+        However often clients report typing, each user's user_typing event is
+        sent at most once per typing interval: immediately on the first report
+        (leading edge), then once at the end of the interval if more reports
+        arrived meanwhile (trailing edge). When no report arrives for the
+        typing timeout, user_stopped_typing is sent.
+        """
+        if list_id not in connection.lists:
+            return
+
+        loop = asyncio.get_running_loop()
+        key = (list_id, connection.user_id)
+        state = self._typing.get(key)
+        if state is None:
+            state = self._typing[key] = TypingState(connection)
+        state.connection = connection
+
+        if state.expiry is not None:
+            state.expiry.cancel()
+        state.expiry = loop.call_later(
+            settings.ws_typing_timeout_seconds, self._typing_stopped, key
+        )
+
+        elapsed = time.monotonic() - state.last_emit
+        if elapsed >= settings.ws_typing_interval_seconds:
+            self._emit_typing(key)
+        elif state.trailing is None:
+            state.trailing = loop.call_later(
+                settings.ws_typing_interval_seconds - elapsed, self._emit_typing, key
+            )
+
+    def _emit_typing(self, key: tuple[str, str]):
+        state = self._typing.get(key)
+        if state is None:
+            return
+        if state.trailing is not None:
+            state.trailing.cancel()
+            state.trailing = None
+        state.last_emit = time.monotonic()
+
+        list_id, user_id = key
+        asyncio.get_running_loop().create_task(self.broadcast(
+            list_id,
+            {
+                "type": "user_typing",
+                "user_id": user_id,
+                "user_name": state.connection.user_name,
+            },
+        ))
+
+    def _typing_stopped(self, key: tuple[str, str]):
+        state = self._typing.pop(key, None)
+        if state is None:
+            return
+        state.cancel()
+
+        list_id, user_id = key
+        asyncio.get_running_loop().create_task(self.broadcast(
+            list_id,
+            {"type": "user_stopped_typing", "user_id": user_id},
+        ))
+
+    def _schedule_expire(self, list_id: str):
+        asyncio.get_running_loop().create_task(self._expire_history(list_id))
+
+    async def _expire_history(self, list_id: str):
+        """Forget a list's replay buffer once no local client has needed it for a while."""
+        self._history_expiry.pop(list_id, None)
+        if list_id in self.channels:
+            return
+        if self._history.pop(list_id, None) is not None:
+            await self.bus.unsubscribe(list_id)
+
+    def _drop(self, connection: Connection, reason: str):
+        """Disconnect a client that cannot keep up with its lists' broadcasts."""
+        if connection.closed:
+            return
+        print(f"[WS] Dropping connection for user {connection.user_id}: {reason}")
+        connection.closed = True
+        self.dropped_connections += 1
+        asyncio.get_running_loop().create_task(
+            self.disconnect(connection.websocket, code=status.WS_1013_TRY_AGAIN_LATER)
+        )
+
     async def broadcast(
         self, list_id: str, message: dict, exclude: Optional[WebSocket] = None
     ):
-        """Broadcast a message to all connections for a specific list."""
-        connections = self.active_connections[list_id]
+        """
+        Broadcast a message to all connections for a specific list, on every instance.
+
+        Item added/updated events are held for a few milliseconds so a burst of
+        them is sent as one items_added/items_updated frame. Any other event
+        flushes the held ones first, so ordering within a list is preserved.
+        """
+        window = settings.ws_coalesce_window_ms / 1000
+        if window > 0 and exclude is None and message.get("type") in COALESCED_EVENTS:
+            self._pending.setdefault(list_id, []).append(message)
+            if list_id not in self._flush_handles:
+                self._flush_handles[list_id] = asyncio.get_running_loop().call_later(
+                    window, self._schedule_flush, list_id
+                )
+            return
+
+        await self._flush(list_id)
+        await self._dispatch(list_id, message, exclude)
+
+    def _schedule_flush(self, list_id: str):
+        asyncio.get_running_loop().create_task(self._flush(list_id))
+
+    async def _flush(self, list_id: str):
+        """Send the item events held for a list, merging consecutive ones."""
+        handle = self._flush_handles.pop(list_id, None)
+        if handle is not None:
+            handle.cancel()
+        pending = self._pending.pop(list_id, None)
+        if not pending:
+            return
+
+        for message in coalesce_item_events(pending):
+            await self._dispatch(list_id, message)
+
+    async def _dispatch(
+        self, list_id: str, message: dict, exclude: Optional[WebSocket] = None
+    ):
+        """Deliver a message locally and publish it to other instances."""
+        self._send_local(list_id, message, exclude)
+        try:
+            await self.bus.publish(list_id, message)
+        except Exception as e:
+            print(f"[WS] Failed to publish to message bus: {e}")
+
+    async def _on_bus_message(self, list_id: str, message: dict):
+        """Deliver a broadcast published by another instance to local connections."""
+        self._send_local(list_id, message)
+
+    def _send_local(
+        self, list_id: str, message: dict, exclude: Optional[WebSocket] = None
+    ):
+        """Queue a message on every connection for a list held by this instance."""
+        connections = self.channels.get(list_id, ())
         print(f"[WS] Broadcasting to list {list_id}: {len(connections)} connections, message type: {message.get('type')}")
-        dead_connections = []
 
+        # Multiplexed connections need to know which list a frame is for
+        if "list_id" not in message:
+            message = {**message, "list_id": list_id}
+
+        # Share one frame (encoded at most once per wire format) with every subscriber
+        history = self._history.get(list_id)
+        if history is not None and message.get("type") not in EPHEMERAL_EVENTS:
+            frame = history.record(message)
+        elif connections:
+            frame = Frame(message)
+        else:
+            return
+
+        excluded_user = (
+            message.get("user_id") if message.get("type") in SELF_EXCLUDED_EVENTS else None
+        )
         for connection in connections:
-            if connection != exclude:
-                try:
-                    await connection.send_json(message)
-                    print(f"[WS] Sent to connection successfully")
-                except Exception as e:
-                    print(f"[WS] Failed to send: {e}")
-                    # Mark connection as dead to remove later
-                    dead_connections.append(connection)
-
-        # Clean up dead connections
-        for connection in dead_connections:
-            await self.disconnect(connection, list_id, "")
-
-    async def send_personal(self, websocket: WebSocket, message: dict):
-        """Send a message to a specific connection."""
-        try:
-            await websocket.send_json(message)
-        except Exception:
-            pass
+            if connection.websocket is not exclude and connection.user_id != excluded_user:
+                connection.enqueue(frame)
+
+    def _is_present(self, user_id: str, list_id: str) -> bool:
+        """Whether any of a user's connections is subscribed to a list."""
+        return any(
+            list_id in connection.lists
+            for connection in self.user_connections.get(user_id, ())
+        )
 
     def get_active_users(self, list_id: str) -> list:
         """Get list of active users for a specific list."""
-        return list(self.active_users[list_id].values())
+        users: Dict[str, dict] = {}
+        for connection in self.channels.get(list_id, ()):
+            user = users.get(connection.user_id)
+            if user is None or connection.connected_at < user["connected_at"]:
+                users[connection.user_id] = {
+                    "user_id": connection.user_id,
+                    "user_name": connection.user_name,
+                    "connected_at": connection.connected_at,
+                }
+        return list(users.values())
 
 
 # Global connection manager instance
-manager = ConnectionManager()
+manager = ConnectionManager(create_message_bus(get_settings()))
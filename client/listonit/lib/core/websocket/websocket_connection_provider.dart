@@ -78,7 +78,10 @@ class WebSocketConnection extends StateNotifier<ConnectionState> {
 
   Future<void> _doConnect() async {
     try {
-      final uri = Uri.parse('$baseUrl/ws/lists/${state.currentListId}?token=$_token');
+      // heartbeat=true: the message router answers the server's pings
+      final uri = Uri.parse(
+        '$baseUrl/ws/lists/${state.currentListId}?token=$_token&heartbeat=true',
+      );
       _channel = WebSocketChannel.connect(uri);
 
       _subscription = _channel!.stream.listen(
@@ -43,6 +43,15 @@ class WebSocketMessageRouter {
           _handleItemDeleted(message);
           break;
 
+        // Batch operations, and bursts of single events the server coalesced
+        case 'items_added':
+          _handleItemsAdded(message);
+          break;
+
+        case 'items_updated':
+          _handleItemsUpdated(message);
+          break;
+
         case 'items_reordered':
           _handleItemsReordered(message);
           break;
@@ -60,6 +69,12 @@ class WebSocketMessageRouter {
           _handleUserTyping(message);
           break;
 
+        // ===== Connection Events =====
+        case 'ping':
+          // Server heartbeat; connections that stop answering are reaped
+          ref.read(websocketConnectionProvider.notifier).send({'type': 'pong'});
+          break;
+
         // ===== Unknown Events =====
         default:
           debugPrint('Unhandled WebSocket message type: $type');
@@ -130,6 +145,48 @@ class WebSocketMessageRouter {
     notifier.deleteItemFromServer(itemId);
   }
 
+  void _handleItemsAdded(Map<String, dynamic> message) {
+    final listId = _extractListId(message);
+    final items = message['items'] as List?;
+    final userId = message['user_id'] as String?;
+
+    if (listId == null || items == null) {
+      debugPrint('Invalid items_added message: missing listId or items');
+      return;
+    }
+
+    if (_isCurrentUser(userId)) {
+      debugPrint('Ignoring own items_added message');
+      return;
+    }
+
+    final notifier = ref.read(itemsProvider(listId).notifier);
+    for (final itemData in items) {
+      notifier.addItemFromServer(itemData as Map<String, dynamic>);
+    }
+  }
+
+  void _handleItemsUpdated(Map<String, dynamic> message) {
+    final listId = _extractListId(message);
+    final items = message['items'] as List?;
+    final userId = message['user_id'] as String?;
+
+    if (listId == null || items == null) {
+      debugPrint('Invalid items_updated message: missing listId or items');
+      return;
+    }
+
+    if (_isCurrentUser(userId)) {
+      debugPrint('Ignoring own items_updated message');
+      return;
+    }
+
+    final notifier = ref.read(itemsProvider(listId).notifier);
+    for (final itemData in items) {
+      notifier.updateItemFromServer(itemData as Map<String, dynamic>);
+    }
+  }
+
   void _handleItemsReordered(Map<String, dynamic> message) {
     final listId = _extractListId(message);
     final items = message['items'] as List?;